@@ -0,0 +1,184 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from slugify import slugify
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.category_counts import (CountDeltas,
+                                         adjust_category_counts, listed)
+from app.backend.conditional import bump_versions
+from app.backend.settings import settings
+from app.models import Category, Product
+from app.schemas import CreateProduct
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson',
+                'application/jsonl', 'application/json-lines')
+CSV_TYPES = ('text/csv', 'application/csv')
+
+
+async def iter_lines(request: Request) -> AsyncIterator[tuple[int, str]]:
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ''
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            line_number += 1
+            yield line_number, line.removesuffix('\r')
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield line_number + 1, buffer.removesuffix('\r')
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[tuple[int, object]]:
+    async for line_number, line in iter_lines(request):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+async def iter_csv(request: Request) -> AsyncIterator[tuple[int, object]]:
+    header = None
+    record, record_line = '', 0
+    async for line_number, line in iter_lines(request):
+        if not record:
+            if not line.strip():
+                continue
+            record, record_line = line, line_number
+        else:
+            record += '\n' + line
+        # A record continues on the next line while a quoted field is open
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]))
+        record = ''
+        if header is None:
+            header = [value.strip() for value in values]
+        elif len(values) != len(header):
+            yield record_line, None
+        else:
+            yield record_line, dict(zip(header, values))
+    if record:
+        yield record_line, None
+
+
+def read_records(request: Request) -> AsyncIterator[tuple[int, object]]:
+    content_type = (request.headers.get('content-type', '')
+                    .split(';')[0].strip().lower())
+    if content_type in NDJSON_TYPES:
+        return iter_ndjson(request)
+    if content_type in CSV_TYPES:
+        return iter_csv(request)
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail='Send products as NDJSON or CSV'
+    )
+
+
+class ProductImporter:
+    def __init__(self, db: AsyncSession, supplier_id: int):
+        self.db = db
+        self.supplier_id = supplier_id
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._categories: dict[int, bool] = {}
+        self._pending: list[tuple[int, CreateProduct]] = []
+
+    def error(self, line: int, detail) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.import_max_errors:
+            self.errors.append({'line': line, 'detail': detail})
+
+    async def add(self, line: int, record) -> None:
+        if not isinstance(record, dict):
+            self.error(line, 'Malformed row')
+            return
+        try:
+            product = CreateProduct.model_validate(record)
+        except ValidationError as e:
+            self.error(line, [{'field': '.'.join(map(str, err['loc'])),
+                               'message': err['msg']}
+                              for err in e.errors()])
+            return
+        self._pending.append((line, product))
+        if len(self._pending) >= settings.import_batch_size:
+            await self.flush()
+
+    async def _resolve_categories(self) -> None:
+        unknown = ({product.category_id for _, product in self._pending} -
+                   self._categories.keys())
+        if not unknown:
+            return
+        query = select(Category.id).where(Category.id.in_(unknown))
+        found = set((await self.db.scalars(query)).all())
+        for category_id in unknown:
+            self._categories[category_id] = category_id in found
+
+    async def _taken_slugs(self, slugs: list[str]) -> set[str]:
+        query = select(Product.slug).where(Product.slug.in_(set(slugs)))
+        taken = set((await self.db.scalars(query)).all())
+        colliding = taken | {slug for slug in slugs if slugs.count(slug) > 1}
+        if colliding:
+            # slugify only emits [a-z0-9-], so the bases need no escaping
+            query = select(Product.slug).where(
+                or_(*(Product.slug.like(f'{slug}-%') for slug in colliding))
+            )
+            taken |= set((await self.db.scalars(query)).all())
+        return taken
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        await self._resolve_categories()
+        lines, rows = [], []
+        for line, product in pending:
+            if not self._categories[product.category_id]:
+                self.error(line, 'There is no category found')
+                continue
+            lines.append(line)
+            rows.append({'slug': slugify(product.name),
+                         'supplier_id': self.supplier_id,
+                         **product.model_dump()})
+        if not rows:
+            return
+
+        taken = await self._taken_slugs([row['slug'] for row in rows])
+        for row in rows:
+            base, suffix = row['slug'], 1
+            while row['slug'] in taken:
+                suffix += 1
+                row['slug'] = f'{base}-{suffix}'
+            taken.add(row['slug'])
+
+        try:
+            await self.db.execute(insert(Product), rows)
+            deltas = CountDeltas()
+            for row in rows:
+                deltas.add(row['category_id'], listed(True, row['stock']))
+            await adjust_category_counts(self.db, deltas)
+            await bump_versions(self.db, 'products')
+            await self.db.commit()
+        except DBAPIError:
+            await self.db.rollback()
+            for line in lines:
+                self.error(line, 'Batch was rejected by the database, '
+                                 'retry these rows')
+            return
+        self.imported += len(rows)
+
+    def report(self) -> dict:
+        return {'imported': self.imported,
+                'failed': self.failed,
+                'errors': self.errors}
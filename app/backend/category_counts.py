@@ -0,0 +1,96 @@
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Category, Product
+from app.models.category_product_count import CategoryProductCount
+from app.models.products import IN_STOCK
+
+
+def listed(is_active: bool | None, stock: int | None) -> bool:
+    return bool(is_active) and stock is not None and stock > 0
+
+
+class CountDeltas(dict):
+    def add(self, category_id: int | None, delta: int) -> None:
+        if category_id is not None and delta:
+            self[category_id] = self.get(category_id, 0) + delta
+
+    def moved(self, previous_category_id: int | None, was_listed: bool,
+              category_id: int | None, is_listed: bool) -> None:
+        self.add(previous_category_id, -was_listed)
+        self.add(category_id, is_listed)
+
+
+def add_to_counts(query):
+    # Deltas commute, so concurrent writers only queue on the counter row
+    # instead of overwriting each other's recount.
+    return query.on_conflict_do_update(
+        index_elements=[CategoryProductCount.category_id],
+        set_={'in_stock': (CategoryProductCount.in_stock +
+                           query.excluded.in_stock)}
+    )
+
+
+def count_deltas_from(deltas: Select):
+    # For statements that work out their deltas themselves; `deltas`
+    # selects one (category_id, delta) row per category.
+    return add_to_counts(pg_insert(CategoryProductCount).from_select(
+        ['category_id', 'in_stock'], deltas
+    ))
+
+
+async def adjust_category_counts(db: AsyncSession, deltas: dict) -> None:
+    rows = [{'category_id': category_id, 'in_stock': delta}
+            for category_id, delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    await db.execute(add_to_counts(pg_insert(CategoryProductCount)), rows)
+
+
+async def rebuild_category_counts(db: AsyncSession) -> None:
+    await db.execute(delete(CategoryProductCount))
+    await db.execute(insert(CategoryProductCount).from_select(
+        ['category_id', 'in_stock'],
+        select(Product.category_id, func.count())
+        .where((Product.is_active == True) & IN_STOCK)
+        .group_by(Product.category_id)
+    ))
+
+
+async def load_tree(db: AsyncSession) -> list[dict]:
+    query = (select(Category.id, Category.name, Category.slug,
+                    Category.parent_id,
+                    func.coalesce(CategoryProductCount.in_stock, 0))
+             .outerjoin(CategoryProductCount,
+                        CategoryProductCount.category_id == Category.id)
+             .where(Category.is_active == True)
+             .order_by(Category.id))
+    rows = (await db.execute(query)).all()
+
+    nodes = {}
+    for category_id, name, slug, parent_id, in_stock in rows:
+        nodes[category_id] = {'id': category_id,
+                              'name': name,
+                              'slug': slug,
+                              'product_count': in_stock,
+                              'subtree_product_count': in_stock,
+                              'children': [],
+                              'parent_id': parent_id}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['parent_id'])
+        if node['parent_id'] is None:
+            roots.append(node)
+        elif parent is not None:
+            parent['children'].append(node)
+        # Children of inactive categories are hidden with their parent.
+
+    def total(node: dict) -> int:
+        node['subtree_product_count'] += sum(total(child)
+                                             for child in node['children'])
+        return node['subtree_product_count']
+
+    for root in roots:
+        total(root)
+    return roots
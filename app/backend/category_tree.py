@@ -0,0 +1,97 @@
+import asyncio
+from time import monotonic
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker
+from app.backend.notifications import listener
+from app.backend.settings import settings
+from app.models import Category
+
+CHANNEL = 'category_tree'
+
+
+def notify_changed():
+    # Used in RETURNING, so every worker drops its tree once the category
+    # write commits.
+    return func.pg_notify(CHANNEL, literal(''))
+
+
+class CategoryTree:
+    def __init__(self):
+        self.by_slug: dict[str, int] = {}
+        self.children: dict[int, tuple[int, ...]] = {}
+        self.descendants: dict[int, frozenset[int]] = {}
+        self.loaded_at: float | None = None
+        self.generation = 0
+        self._lock = asyncio.Lock()
+
+    def build(self, rows) -> None:
+        by_slug = {}
+        children = {}
+        active = set()
+        for category_id, slug, parent_id, is_active in rows:
+            if is_active:
+                by_slug[slug] = category_id
+                active.add(category_id)
+            children.setdefault(parent_id, []).append(category_id)
+
+        descendants = {}
+        for category_id in active:
+            subtree = {category_id}
+            stack = [category_id]
+            while stack:
+                for child_id in children.get(stack.pop(), ()):
+                    if child_id in active and child_id not in subtree:
+                        subtree.add(child_id)
+                        stack.append(child_id)
+            descendants[category_id] = frozenset(subtree)
+
+        self.by_slug = by_slug
+        self.children = {k: tuple(v) for k, v in children.items()}
+        self.descendants = descendants
+        self.loaded_at = monotonic()
+
+    def stale(self) -> bool:
+        return (self.loaded_at is None or
+                monotonic() - self.loaded_at >
+                settings.category_tree_ttl_seconds)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self.loaded_at = None
+
+    async def _load(self, db: AsyncSession) -> None:
+        generation = self.generation
+        query = select(Category.id, Category.slug,
+                       Category.parent_id, Category.is_active)
+        self.build((await db.execute(query)).all())
+        # A change notified while the query ran may not be in these rows.
+        if self.generation != generation:
+            self.loaded_at = None
+
+    async def load(self, db: AsyncSession) -> None:
+        async with self._lock:
+            await self._load(db)
+
+    async def refresh_if_stale(self) -> None:
+        if self.stale():
+            async with self._lock:
+                # Requests queued on the lock find the tree already reloaded.
+                if self.stale():
+                    # From the primary: a lagging replica could rebuild the
+                    # tree a notification just dropped.
+                    async with async_session_maker() as db:
+                        await self._load(db)
+
+    def subtree(self, slug: str) -> frozenset[int] | None:
+        category_id = self.by_slug.get(slug)
+        if category_id is None:
+            return None
+        return self.descendants[category_id]
+
+
+category_tree = CategoryTree()
+listener.subscribe(CHANNEL, lambda payload: category_tree.invalidate(),
+                   category_tree.invalidate)
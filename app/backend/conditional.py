@@ -0,0 +1,72 @@
+from datetime import UTC
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.resource_version import ResourceVersion
+
+
+async def bump_versions(db: AsyncSession, *resources: str) -> None:
+    query = (update(ResourceVersion)
+             .where(ResourceVersion.name.in_(resources))
+             .values(version=ResourceVersion.version + 1,
+                     updated_at=func.now())
+             .execution_options(synchronize_session=False))
+    await db.execute(query)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    weak_etag = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == weak_etag
+               for tag in if_none_match.split(','))
+
+
+def modified_since(if_modified_since: str, last_modified) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return last_modified.replace(microsecond=0) > since
+
+
+def versions_query(*resources: str):
+    return (select(ResourceVersion.name,
+                   ResourceVersion.version,
+                   ResourceVersion.updated_at)
+            .where(ResourceVersion.name.in_(resources))
+            .order_by(ResourceVersion.name))
+
+
+async def conditional_response(request: Request, response: Response,
+                               db: AsyncSession,
+                               *resources: str) -> Response | None:
+    versions = (await db.execute(versions_query(*resources))).all()
+    if not versions:
+        return None
+
+    etag = 'W/"{}"'.format('-'.join(f'{name}.{version}'
+                                    for name, version, _ in versions))
+    last_modified = max(updated_at for *_, updated_at in versions)
+    headers = {'ETag': etag,
+               'Last-Modified': format_datetime(last_modified.astimezone(UTC),
+                                                usegmt=True)}
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get('if-none-match')
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, etag)
+    elif if_modified_since is not None:
+        not_modified = not modified_since(if_modified_since, last_modified)
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers=headers)
+    return None
@@ -1,23 +1,59 @@
 from typing import Annotated
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from app.backend import metrics
 from app.backend.settings import settings
+from app.backend.slow_queries import slow_query_log
 
-DB_URL = (f'postgresql+asyncpg://'
-          f'{settings.db_user}:{settings.db_password}'
-          f'@{settings.db_host}:{settings.db_port}/{settings.db_name}')
 
-engine = create_async_engine(
-    DB_URL,
-    echo=True
-)
+def database_url(host: str, port: str) -> str:
+    return (f'postgresql+asyncpg://'
+            f'{settings.db_user}:{settings.db_password}'
+            f'@{host}:{port}/{settings.db_name}'
+            f'?prepared_statement_cache_size='
+            f'{settings.db_prepared_statement_cache_size}')
+
+
+def create_engine(url: str):
+    connect_args = {'statement_cache_size': settings.db_statement_cache_size}
+    if settings.db_command_timeout is not None:
+        connect_args['command_timeout'] = settings.db_command_timeout
+    engine = create_async_engine(
+        url,
+        echo=settings.db_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args
+    )
+    if settings.metrics_enabled:
+        event.listen(engine.sync_engine, 'before_cursor_execute',
+                     metrics.before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute',
+                     metrics.after_cursor_execute)
+    if slow_query_log is not None:
+        slow_query_log.instrument(engine)
+    return engine
+
+
+DB_URL = database_url(settings.db_host, settings.db_port)
+
+engine = create_engine(DB_URL)
+read_engine = (create_engine(database_url(settings.db_read_host,
+                                          settings.db_read_port))
+               if settings.db_read_host else engine)
 
 async_session_maker = async_sessionmaker(bind=engine,
                                          expire_on_commit=False,
                                          class_=AsyncSession)
+read_session_maker = async_sessionmaker(bind=read_engine,
+                                        expire_on_commit=False,
+                                        class_=AsyncSession)
 
 unique_str = Annotated[str, mapped_column(unique=True)]
 bool_with_default = lambda b: Annotated[bool, mapped_column(default=b)]
@@ -0,0 +1,28 @@
+from typing import Sequence
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+
+def parse_fields(fields: str | None,
+                 schema: type[BaseModel]) -> list[str] | None:
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(',')
+                               if name.strip()))
+    unknown = [name for name in names if name not in schema.model_fields]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Unknown fields: {", ".join(unknown)}' if unknown
+                   else 'No fields requested'
+        )
+    return names
+
+
+def project(model, fields: Sequence[str]) -> list:
+    return [getattr(model, name) for name in fields]
+
+
+def to_dict(row: Sequence, fields: Sequence[str]) -> dict:
+    return dict(zip(fields, row[-len(fields):]))
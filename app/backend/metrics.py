@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.)
+QUERY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    query_seconds: float = .0
+    rows: int = 0
+    scope: dict | None = field(default=None, repr=False)
+
+
+def route_path(scope: dict) -> str:
+    # Unmatched paths share one label to keep cardinality bounded.
+    return getattr(scope.get('route'), 'path', 'unmatched')
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    'current_request', default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = .0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        prefix = f'{labels},' if labels else ''
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} '
+                         f'{cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        labels = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{labels} {self.sum}')
+        lines.append(f'{name}_count{labels} {self.count}')
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statuses: dict[int, int] = {}
+        self.db = RequestStats()
+
+    def observe(self, seconds: float, status_code: int,
+                stats: RequestStats) -> None:
+        self.latency.observe(seconds)
+        self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+        self.db.queries += stats.queries
+        self.db.query_seconds += stats.query_seconds
+        self.db.rows += stats.rows
+
+
+class Metrics:
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        # Queries run outside a request, e.g. by the lifespan or commands.
+        self.background = RequestStats()
+        self.query_latency = Histogram(QUERY_BUCKETS)
+
+    def observe_request(self, method: str, route: str, seconds: float,
+                        status_code: int, stats: RequestStats) -> None:
+        key = (method, route)
+        if key not in self.routes:
+            self.routes[key] = RouteMetrics()
+        self.routes[key].observe(seconds, status_code, stats)
+
+    def observe_query(self, seconds: float, rows: int) -> None:
+        self.query_latency.observe(seconds)
+        stats = current_request.get() or self.background
+        stats.queries += 1
+        stats.query_seconds += seconds
+        stats.rows += max(rows, 0)
+
+    def render(self) -> str:
+        lines = ['# TYPE http_request_duration_seconds histogram']
+        for (method, route), metrics in self.routes.items():
+            lines += metrics.latency.render(
+                'http_request_duration_seconds',
+                f'method="{method}",route="{route}"'
+            )
+        lines.append('# TYPE http_responses_total counter')
+        for (method, route), metrics in self.routes.items():
+            for status_code, count in sorted(metrics.statuses.items()):
+                lines.append(f'http_responses_total{{method="{method}",'
+                             f'route="{route}",status="{status_code}"}} '
+                             f'{count}')
+        for name, attribute in (
+            ('db_queries_total', 'queries'),
+            ('db_query_seconds_total', 'query_seconds'),
+            ('db_rows_total', 'rows'),
+        ):
+            lines.append(f'# TYPE {name} counter')
+            for (method, route), metrics in self.routes.items():
+                lines.append(f'{name}{{method="{method}",route="{route}"}} '
+                             f'{getattr(metrics.db, attribute)}')
+        lines.append('# TYPE db_background_queries_total counter')
+        lines.append(f'db_background_queries_total {self.background.queries}')
+        lines.append('# TYPE db_query_duration_seconds histogram')
+        lines += self.query_latency.render('db_query_duration_seconds', '')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    conn.info.setdefault('query_start', []).append(perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context,
+                         executemany):
+    seconds = perf_counter() - conn.info['query_start'].pop()
+    metrics.observe_query(seconds, cursor.rowcount)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope=scope)
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            metrics.observe_request(scope['method'], route_path(scope),
+                                    perf_counter() - start, status_code,
+                                    stats)
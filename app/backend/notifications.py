@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+
+from app.backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Listener:
+    """One LISTEN connection per worker, shared by the in-process caches."""
+
+    def __init__(self):
+        self._handlers: dict[str, Callable[[str], None]] = {}
+        self._resets: list[Callable[[], None]] = []
+        self._connection: asyncpg.Connection | None = None
+        self._reconnect: asyncio.Task | None = None
+        self._closing = False
+
+    def subscribe(self, channel: str, handler: Callable[[str], None],
+                  reset: Callable[[], None]) -> None:
+        # `reset` runs when notifications may have been missed.
+        self._handlers[channel] = handler
+        self._resets.append(reset)
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    def _notified(self, connection, pid, channel, payload) -> None:
+        self._handlers[channel](payload)
+
+    def _reset(self) -> None:
+        for reset in self._resets:
+            reset()
+
+    def _terminated(self, connection) -> None:
+        self._connection = None
+        self._reset()
+        if not self._closing:
+            self._reconnect = asyncio.create_task(self._listen_forever())
+
+    async def start(self) -> None:
+        self._closing = False
+        connection = await asyncpg.connect(
+            user=settings.db_user, password=settings.db_password,
+            host=settings.db_host, port=settings.db_port,
+            database=settings.db_name
+        )
+        for channel in self._handlers:
+            await connection.add_listener(channel, self._notified)
+        connection.add_termination_listener(self._terminated)
+        self._connection = connection
+
+    async def _listen_forever(self) -> None:
+        delay = 1
+        while not self._closing:
+            try:
+                await self.start()
+                # Entries cached while disconnected missed their
+                # notifications.
+                self._reset()
+                return
+            except (OSError, asyncpg.PostgresError) as error:
+                logger.warning('notification listener reconnect failed: %s',
+                               error)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+listener = Listener()
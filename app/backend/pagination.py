@@ -0,0 +1,53 @@
+import base64
+import binascii
+import json
+from typing import Annotated, Any, Callable, Sequence
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, tuple_
+
+from app.backend.settings import settings
+
+
+PageLimit = Annotated[int, Query(ge=1, le=settings.page_max_limit)]
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+    if not (isinstance(values, list) and len(values) == size and
+            all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                for v in values)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail='Invalid cursor')
+    return tuple(values)
+
+
+def keyset(query: Select, keys: Sequence, cursor: str | None,
+           limit: int, descending: bool = False) -> Select:
+    if cursor is not None:
+        values = decode_cursor(cursor, len(keys))
+        if descending:
+            query = query.where(tuple_(*keys) < tuple_(*values))
+        else:
+            query = query.where(tuple_(*keys) > tuple_(*values))
+    if descending:
+        keys = [key.desc() for key in keys]
+    return query.order_by(*keys).limit(limit + 1)
+
+
+def page(items: Sequence, limit: int,
+         key: Callable[[Any], tuple] = lambda item: (item.id,)) -> dict:
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*key(items[-1]))
+    return {'items': items, 'next_cursor': next_cursor}
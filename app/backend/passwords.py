@@ -0,0 +1,50 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.backend.settings import settings
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        # Pinning min and max rounds to the configured cost makes passlib
+        # report any hash made with a different cost as needing an update.
+        self.context = CryptContext(schemes=['bcrypt'],
+                                    deprecated='auto',
+                                    bcrypt__default_rounds=rounds,
+                                    bcrypt__min_rounds=rounds,
+                                    bcrypt__max_rounds=rounds)
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='bcrypt')
+        self._max_pending = max_pending
+        self._pending = 0
+
+    async def _run(self, func, *args):
+        if self._pending >= self._max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail='Server is busy, try again later',
+                headers={'Retry-After': '1'}
+            )
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(
+            self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._run(self.context.verify_and_update,
+                               password, hashed_password)
+
+
+password_hasher = PasswordHasher(settings.bcrypt_rounds,
+                                 settings.password_hash_workers,
+                                 settings.password_hash_max_pending)
@@ -0,0 +1,216 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+
+from sqlalchemy import String, column, func, select, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.cache import TTLCache
+from app.backend.db import async_session_maker
+from app.backend.notifications import listener
+from app.backend.settings import settings
+from app.models import Product
+from app.models.products import IN_STOCK
+from app.schemas import ProductRead
+
+try:
+    from redis import asyncio as redis
+    from redis.exceptions import RedisError
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'product_cache'
+STALE_SLUGS = 'product_cache_stale_slugs'
+
+
+def notify_changed(slug):
+    # Used in RETURNING, so the notification rides on the write itself.
+    return func.pg_notify(CHANNEL, slug)
+
+
+class CacheBackend(ABC):
+    # Shared backends are seen by every worker, so the writer deletes its
+    # keys once; the other workers only need to hear about the write.
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> dict | None:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: dict) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize, ttl)
+
+    async def get(self, key: str) -> dict | None:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: dict) -> None:
+        self.cache.set(key, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.pop(key)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return {'backend': 'memory', **self.cache.stats()}
+
+
+class RedisCacheBackend(CacheBackend):
+    shared = True
+
+    def __init__(self, url: str, ttl: float, prefix: str = 'product:'):
+        if redis is None:
+            raise RuntimeError('PRODUCT_CACHE_BACKEND=redis needs the '
+                               'redis package installed')
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> dict | None:
+        value = await self.client.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    async def set(self, key: str, value: dict) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value),
+                              ex=max(1, int(self.ttl)))
+
+    async def delete(self, *keys: str) -> None:
+        # Only called once the write has committed, so a failure must not
+        # fail the request; the entries still expire with their TTL.
+        if keys:
+            try:
+                await self.client.delete(*(self.prefix + key
+                                           for key in keys))
+            except RedisError:
+                logger.exception('product cache delete failed')
+
+    def clear(self) -> None:
+        # Entries expire on their own; there is nothing held in-process.
+        pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'backend': 'redis',
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else .0}
+
+
+class ProductCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.generation = 0
+
+    async def get(self, slug: str) -> dict | None:
+        # Active products by slug; callers apply their own stock checks.
+        product = await self.backend.get(slug)
+        if product is None:
+            generation = self.generation
+            # Misses load from the primary: a lagging replica could return
+            # the row a notification has just invalidated.
+            async with async_session_maker() as db:
+                row = await db.scalar(select(Product)
+                                      .where((Product.slug == slug) &
+                                             (Product.is_active == True)))
+                if row is None:
+                    return None
+                product = ProductRead.model_validate(row).model_dump()
+            # A write notified while the row loaded may not be in it.
+            if self.generation == generation:
+                await self.backend.set(slug, product)
+        return product
+
+    async def warm(self, db: AsyncSession, limit: int) -> None:
+        generation = self.generation
+        query = (select(Product)
+                 .where((Product.is_active == True) & IN_STOCK)
+                 .order_by(Product.rating.desc(), Product.id.desc())
+                 .limit(limit))
+        products = [ProductRead.model_validate(row).model_dump()
+                    for row in (await db.scalars(query)).all()]
+        if self.generation != generation:
+            return
+        for product in products:
+            await self.backend.set(product['slug'], product)
+
+    async def forget(self, db: AsyncSession, *slugs: str) -> list[str]:
+        # For writes that already notified with notify_changed(); the
+        # notification reaches every worker, this one included, on commit.
+        slugs = [slug for slug in slugs if slug is not None]
+        if not slugs:
+            return slugs
+        self.generation += 1
+        if self.backend.shared:
+            # Deleted once the write commits, see committed().
+            db.info.setdefault(STALE_SLUGS, set()).update(slugs)
+        else:
+            await self.backend.delete(*slugs)
+        return slugs
+
+    async def invalidate(self, db: AsyncSession, *slugs: str) -> None:
+        # Called inside the write's transaction.
+        slugs = await self.forget(db, *slugs)
+        if slugs:
+            notify = values(column('slug', String), name='slugs').data(
+                [(slug,) for slug in slugs]
+            )
+            await db.execute(select(notify_changed(notify.c.slug)))
+
+    async def committed(self, db: AsyncSession) -> None:
+        # A shared backend may have been refilled with the old row by a
+        # reader that ran before the write committed.
+        slugs = db.info.pop(STALE_SLUGS, None)
+        if slugs:
+            await self.backend.delete(*slugs)
+
+    def notified(self, slug: str) -> None:
+        self.generation += 1
+        if not self.backend.shared:
+            self.backend.cache.pop(slug)
+
+    def reset(self) -> None:
+        self.generation += 1
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+def create_backend() -> CacheBackend:
+    if settings.product_cache_backend == 'redis':
+        return RedisCacheBackend(settings.redis_url,
+                                 settings.product_cache_ttl_seconds)
+    return MemoryCacheBackend(settings.product_cache_size,
+                              settings.product_cache_ttl_seconds)
+
+
+product_cache = ProductCache(create_backend())
+listener.subscribe(CHANNEL, product_cache.notified, product_cache.reset)
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+from typing import Annotated, Literal
+
+from fastapi import Query
+from sqlalchemy import Select, and_, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.backend.fieldsets import project, to_dict
+from app.backend.pagination import keyset, page
+from app.backend.responses import FastJSONResponse
+from app.backend.settings import settings
+from app.models import Category, Product
+from app.models.products import IN_STOCK
+
+ProductSort = Literal['price_asc', 'price_desc', 'rating', 'newest']
+
+SORTS = {
+    None: ((Product.id,), False),
+    'price_asc': ((Product.price, Product.id), False),
+    'price_desc': ((Product.price, Product.id), True),
+    'rating': ((Product.rating, Product.id), True),
+    'newest': ((Product.id,), True),
+}
+RATING_FACETS = (1, 2, 3, 4)
+
+
+@dataclass
+class ProductFilters:
+    min_price: Annotated[int | None, Query(ge=0)] = None
+    max_price: Annotated[int | None, Query(ge=0)] = None
+    min_rating: Annotated[float | None, Query(ge=0, le=5)] = None
+    in_stock: bool = True
+    sort: ProductSort | None = None
+    facets: bool = False
+
+
+class ProductListing:
+    def __init__(self, filters: ProductFilters, fields: list[str] | None,
+                 *conditions, join_category: bool = False):
+        self.filters = filters
+        self.fields = fields
+        self.conditions = [Product.is_active == True, *conditions]
+        if join_category:
+            self.conditions.append(Category.is_active == True)
+        self.join_category = join_category
+        self.keys, self.descending = SORTS[filters.sort]
+
+    def facet_conditions(self, skip: str | None = None) -> list:
+        conditions = []
+        if skip != 'price':
+            if self.filters.min_price is not None:
+                conditions.append(Product.price >= self.filters.min_price)
+            if self.filters.max_price is not None:
+                conditions.append(Product.price <= self.filters.max_price)
+        if skip != 'rating' and self.filters.min_rating is not None:
+            conditions.append(Product.rating >= self.filters.min_rating)
+        if skip != 'in_stock' and self.filters.in_stock:
+            conditions.append(IN_STOCK)
+        return conditions
+
+    def select(self, *columns) -> Select:
+        query = select(*columns)
+        if self.join_category:
+            query = query.join(Category)
+        return query.where(*self.conditions)
+
+    def order_keys(self, keys) -> list:
+        return [key.desc() for key in keys] if self.descending else keys
+
+    def stream_query(self) -> Select:
+        return (self.select(Product)
+                .where(*self.facet_conditions())
+                .order_by(*self.order_keys(self.keys)))
+
+    def page_query(self, cursor: str | None, limit: int) -> Select:
+        if self.fields is None:
+            columns = [Product]
+        else:
+            columns = [key.label(f'cursor_{i}')
+                       for i, key in enumerate(self.keys)]
+            columns += project(Product, self.fields)
+        query = self.select(*columns).where(*self.facet_conditions())
+        return keyset(query, self.keys, cursor, limit, self.descending)
+
+    def price_buckets(self) -> list[tuple[int, int | None]]:
+        bounds = [0, *settings.price_facet_bounds]
+        return list(zip(bounds, bounds[1:] + [None]))
+
+    def facet_query(self) -> Select:
+        # Each facet is counted with every filter except its own, so the
+        # client can see what widening that filter would return.
+        def count(*conditions):
+            return func.count().filter(and_(true(), *conditions))
+
+        columns = [count(*self.facet_conditions()).label('facet_total')]
+        for i, (low, high) in enumerate(self.price_buckets()):
+            bucket = [Product.price >= low]
+            if high is not None:
+                bucket.append(Product.price < high)
+            columns.append(count(*self.facet_conditions('price'), *bucket)
+                           .label(f'facet_price_{i}'))
+        for grade in RATING_FACETS:
+            columns.append(count(*self.facet_conditions('rating'),
+                                 Product.rating >= grade)
+                           .label(f'facet_rating_{grade}'))
+        columns.append(count(*self.facet_conditions('in_stock'), IN_STOCK)
+                       .label('facet_in_stock'))
+        columns.append(count(*self.facet_conditions('in_stock'))
+                       .label('facet_any_stock'))
+        return self.select(*columns)
+
+    def facets(self, row) -> dict:
+        counts = row._mapping
+        return {
+            'total': counts['facet_total'],
+            'price': [{'min': low, 'max': high,
+                       'count': counts[f'facet_price_{i}']}
+                      for i, (low, high) in enumerate(self.price_buckets())],
+            'rating': [{'min': grade, 'count': counts[f'facet_rating_{grade}']}
+                       for grade in RATING_FACETS],
+            'in_stock': counts['facet_in_stock'],
+            'out_of_stock': (counts['facet_any_stock'] -
+                             counts['facet_in_stock']),
+        }
+
+    async def fetch(self, db: AsyncSession, cursor: str | None,
+                    limit: int) -> tuple[list, dict | None]:
+        page_query = self.page_query(cursor, limit)
+        if not self.filters.facets:
+            if self.fields is None:
+                return (await db.scalars(page_query)).all(), None
+            return (await db.execute(page_query)).all(), None
+
+        # The page is outer-joined onto the single facet row, so one
+        # statement returns both, even when the page is empty.
+        facets = self.facet_query().subquery('facets')
+        products = page_query.subquery('page')
+        if self.fields is None:
+            entity = aliased(Product, products)
+            query = select(entity, facets)
+            keys = [getattr(entity, key.key) for key in self.keys]
+        else:
+            query = select(facets, products)
+            keys = [products.c[f'cursor_{i}'] for i in range(len(self.keys))]
+        query = (query.select_from(facets)
+                 .outerjoin(products, true())
+                 .order_by(*self.order_keys(keys)))
+        rows = (await db.execute(query)).all()
+        if self.fields is None:
+            items = [row[0] for row in rows if row[0] is not None]
+        else:
+            items = [row for row in rows if row.cursor_0 is not None]
+        return items, self.facets(rows[0])
+
+    def page(self, products: list, facets: dict | None, limit: int,
+             headers: dict | None = None):
+        if self.fields is None:
+            result = page(products, limit,
+                          key=lambda product: tuple(getattr(product, key.key)
+                                                    for key in self.keys))
+        else:
+            result = page(products, limit,
+                          key=lambda row: tuple(row._mapping[f'cursor_{i}']
+                                                for i in range(len(self.keys))))
+            result['items'] = [to_dict(row, self.fields)
+                               for row in result['items']]
+        if facets is not None:
+            result['facets'] = facets
+        if self.fields is not None:
+            # Returned as is, so the validators have to be passed along.
+            return FastJSONResponse(result, headers=headers)
+        return result
@@ -0,0 +1,89 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from math import ceil
+from time import monotonic
+
+from fastapi import HTTPException, Request, status
+
+from app.backend.settings import settings
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token from the bucket at `key`.
+
+        Returns 0 when a token was taken, otherwise the number of seconds
+        until one becomes available.
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = monotonic()
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        wait = .0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # Evicting the least recently used bucket only ever forgets a
+        # limit, it never blocks a client that is within it.
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RateLimiter:
+    """Token buckets per username and per client address.
+
+    The address is `request.client.host`. Behind a load balancer or reverse
+    proxy that is the proxy's address unless uvicorn runs with
+    `--proxy-headers` and `--forwarded-allow-ips` (FORWARDED_ALLOW_IPS)
+    naming the proxies, so that it takes the client from X-Forwarded-For.
+    """
+
+    def __init__(self, backend: RateLimitBackend, name: str,
+                 per_minute: float, burst: int,
+                 ip_per_minute: float, ip_burst: int):
+        self.backend = backend
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.ip_rate = ip_per_minute / 60
+        self.ip_burst = ip_burst
+
+    async def check(self, request: Request, username: str) -> None:
+        client = request.client.host if request.client else 'unknown'
+        wait = max([
+            await self.backend.take(f'{self.name}:ip:{client}',
+                                    self.ip_rate, self.ip_burst),
+            await self.backend.take(f'{self.name}:user:{username.lower()}',
+                                    self.rate, self.burst),
+        ])
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail='Too many attempts, try again later',
+                headers={'Retry-After': str(ceil(wait))}
+            )
+
+
+rate_limit_backend = MemoryBackend(settings.rate_limit_max_keys)
+login_limiter = RateLimiter(rate_limit_backend, 'login',
+                            settings.login_rate_per_minute,
+                            settings.login_burst,
+                            settings.login_ip_rate_per_minute,
+                            settings.login_ip_burst)
+signup_limiter = RateLimiter(rate_limit_backend, 'signup',
+                             settings.signup_rate_per_minute,
+                             settings.signup_burst,
+                             settings.signup_ip_rate_per_minute,
+                             settings.signup_ip_burst)
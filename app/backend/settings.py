@@ -3,6 +3,18 @@ from os import getenv
 from dotenv import load_dotenv
 
 
+def getenv_bool(key: str, default: bool = False) -> bool:
+    value = getenv(key)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def getenv_float(key: str) -> float | None:
+    value = getenv(key)
+    return None if value is None else float(value)
+
+
 class Settings:
     def __init__(self):
         load_dotenv()
@@ -11,11 +23,91 @@ class Settings:
         self.db_name = getenv('DB_NAME')
         self.db_host = getenv('DB_HOST')
         self.db_port = getenv('DB_PORT')
+        self.db_read_host = getenv('DB_READ_HOST')
+        self.db_read_port = getenv('DB_READ_PORT', self.db_port)
+        self.db_echo = getenv_bool('DB_ECHO')
+        self.db_pool_size = int(getenv('DB_POOL_SIZE', 5))
+        self.db_max_overflow = int(getenv('DB_MAX_OVERFLOW', 10))
+        self.db_pool_timeout = float(getenv('DB_POOL_TIMEOUT', 30))
+        self.db_pool_recycle = int(getenv('DB_POOL_RECYCLE', -1))
+        self.db_pool_pre_ping = getenv_bool('DB_POOL_PRE_PING')
+        self.db_command_timeout = getenv_float('DB_COMMAND_TIMEOUT')
+        self.db_statement_cache_size = int(
+            getenv('DB_STATEMENT_CACHE_SIZE', 100)
+        )
+        self.db_prepared_statement_cache_size = int(
+            getenv('DB_PREPARED_STATEMENT_CACHE_SIZE', 100)
+        )
         self.secret_key = getenv('JWT_SECRET_KEY')
         self.algorithm = getenv('JWT_ALGORITHM')
         self.token_expires_seconds = int(
             getenv('JWT_ACCESS_TOKEN_EXPIRES_SECONDS')
         )
+        self.token_cache_size = int(getenv('TOKEN_CACHE_SIZE', 10000))
+        self.user_status_cache_size = int(
+            getenv('USER_STATUS_CACHE_SIZE', 10000)
+        )
+        self.user_status_ttl_seconds = int(
+            getenv('USER_STATUS_TTL_SECONDS', 300)
+        )
+        self.page_default_limit = int(getenv('PAGE_DEFAULT_LIMIT', 50))
+        self.page_max_limit = int(getenv('PAGE_MAX_LIMIT', 500))
+        self.login_rate_per_minute = float(
+            getenv('LOGIN_RATE_PER_MINUTE', 10)
+        )
+        self.login_burst = int(getenv('LOGIN_BURST', 5))
+        self.signup_rate_per_minute = float(
+            getenv('SIGNUP_RATE_PER_MINUTE', 5)
+        )
+        self.signup_burst = int(getenv('SIGNUP_BURST', 5))
+        # Per client address. Every client behind a NAT or a proxy shares
+        # one bucket, so these are looser than the per-username limits.
+        self.login_ip_rate_per_minute = float(
+            getenv('LOGIN_IP_RATE_PER_MINUTE', 60)
+        )
+        self.login_ip_burst = int(getenv('LOGIN_IP_BURST', 30))
+        self.signup_ip_rate_per_minute = float(
+            getenv('SIGNUP_IP_RATE_PER_MINUTE', 20)
+        )
+        self.signup_ip_burst = int(getenv('SIGNUP_IP_BURST', 10))
+        self.rate_limit_max_keys = int(getenv('RATE_LIMIT_MAX_KEYS', 100000))
+        self.bcrypt_rounds = int(getenv('BCRYPT_ROUNDS', 12))
+        self.password_hash_workers = int(getenv('PASSWORD_HASH_WORKERS', 2))
+        self.password_hash_max_pending = int(
+            getenv('PASSWORD_HASH_MAX_PENDING', 32)
+        )
+        self.import_batch_size = int(getenv('IMPORT_BATCH_SIZE', 1000))
+        self.import_max_errors = int(getenv('IMPORT_MAX_ERRORS', 1000))
+        self.price_facet_bounds = [
+            int(bound) for bound in
+            getenv('PRICE_FACET_BOUNDS', '1000,5000,10000,50000').split(',')
+        ]
+        self.stream_batch_size = int(getenv('STREAM_BATCH_SIZE', 500))
+        self.category_tree_ttl_seconds = int(
+            getenv('CATEGORY_TREE_TTL_SECONDS', 60)
+        )
+        self.product_cache_backend = getenv('PRODUCT_CACHE_BACKEND', 'memory')
+        self.product_cache_size = int(getenv('PRODUCT_CACHE_SIZE', 10000))
+        self.product_cache_ttl_seconds = int(
+            getenv('PRODUCT_CACHE_TTL_SECONDS', 60)
+        )
+        self.redis_url = getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.warmup_connections = int(
+            getenv('WARMUP_CONNECTIONS', self.db_pool_size)
+        )
+        self.warmup_products = int(getenv('WARMUP_PRODUCTS', 100))
+        self.health_timeout_seconds = float(
+            getenv('HEALTH_TIMEOUT_SECONDS', 1)
+        )
+        self.metrics_enabled = getenv_bool('METRICS_ENABLED', True)
+        self.slow_query_ms = getenv_float('SLOW_QUERY_MS')
+        self.slow_query_log_size = int(getenv('SLOW_QUERY_LOG_SIZE', 500))
+        self.slow_query_explain_rate = float(
+            getenv('SLOW_QUERY_EXPLAIN_RATE', .1)
+        )
+        self.slow_query_explain_timeout_ms = int(
+            getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 5000)
+        )
 
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import random
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from time import perf_counter
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.backend.metrics import current_request, route_path
+from app.backend.settings import settings
+
+WHITESPACE = re.compile(r'\s+')
+LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b")
+LISTS = re.compile(r'\?(?:\s*,\s*\?)+')
+
+
+def fingerprint(statement: str) -> str:
+    statement = LITERALS.sub('?', WHITESPACE.sub(' ', statement.strip()))
+    # Expanded IN lists differ only in length.
+    return LISTS.sub('?, ...', statement)
+
+
+def explainable(statement: str) -> bool:
+    # EXPLAIN ANALYZE runs the statement, so only plain reads qualify.
+    statement = statement.lstrip().upper()
+    return statement.startswith('SELECT') and 'FOR UPDATE' not in statement
+
+
+@dataclass
+class SlowQuery:
+    fingerprint: str
+    statement: str
+    parameters: str
+    duration_ms: float
+    route: str | None
+    recorded_at: datetime
+    plan: str | None = None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, size: int, explain_rate: float,
+                 explain_timeout_ms: int, max_explains: int = 2):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self.max_explains = max_explains
+        self.entries: deque[SlowQuery] = deque(maxlen=size)
+        self._explains: set[asyncio.Task] = set()
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        def before_cursor_execute(conn, cursor, statement, parameters,
+                                  context, executemany):
+            conn.info.setdefault('slow_query_start', []).append(
+                perf_counter()
+            )
+
+        def after_cursor_execute(conn, cursor, statement, parameters,
+                                 context, executemany):
+            duration_ms = (perf_counter() -
+                           conn.info['slow_query_start'].pop()) * 1000
+            if (duration_ms >= self.threshold_ms and not executemany and
+                    context.execution_options.get('slow_query_log', True)):
+                self.record(engine, statement, parameters, duration_ms)
+
+        event.listen(engine.sync_engine, 'before_cursor_execute',
+                     before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute',
+                     after_cursor_execute)
+
+    def record(self, engine: AsyncEngine, statement: str, parameters,
+               duration_ms: float) -> None:
+        request = current_request.get()
+        entry = SlowQuery(
+            fingerprint=fingerprint(statement),
+            statement=statement,
+            parameters=repr(parameters)[:1000],
+            duration_ms=duration_ms,
+            route=(route_path(request.scope)
+                   if request is not None and request.scope is not None
+                   else None),
+            recorded_at=datetime.now(UTC)
+        )
+        self.entries.append(entry)
+        if (explainable(statement) and
+                len(self._explains) < self.max_explains and
+                random.random() < self.explain_rate):
+            # The hook runs inside the request's greenlet, so the plan is
+            # captured by a separate task on its own pooled connection.
+            task = asyncio.get_running_loop().create_task(
+                self.explain(engine, entry, statement, parameters)
+            )
+            self._explains.add(task)
+            task.add_done_callback(self._explains.discard)
+
+    async def explain(self, engine: AsyncEngine, entry: SlowQuery,
+                      statement: str, parameters) -> None:
+        try:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(slow_query_log=False)
+                await conn.execute(text(
+                    f'SET LOCAL statement_timeout = '
+                    f'{int(self.explain_timeout_ms)}'
+                ))
+                result = await conn.exec_driver_sql(
+                    f'EXPLAIN (ANALYZE, BUFFERS) {statement}',
+                    tuple(parameters or ())
+                )
+                entry.plan = '\n'.join(row[0] for row in result)
+                await conn.rollback()
+        except Exception as error:
+            entry.plan = f'EXPLAIN failed: {error}'
+
+    def worst(self, limit: int) -> list[dict]:
+        groups = {}
+        for entry in self.entries:
+            group = groups.get(entry.fingerprint)
+            if group is None:
+                group = groups[entry.fingerprint] = {
+                    'fingerprint': entry.fingerprint,
+                    'count': 0,
+                    'total_ms': .0,
+                    'max_ms': .0,
+                    'routes': set(),
+                    'statement': entry.statement,
+                    'parameters': entry.parameters,
+                    'plan': None,
+                    'last_seen': entry.recorded_at,
+                }
+            group['count'] += 1
+            group['total_ms'] += entry.duration_ms
+            group['last_seen'] = entry.recorded_at
+            if entry.route is not None:
+                group['routes'].add(entry.route)
+            if entry.duration_ms >= group['max_ms']:
+                group['max_ms'] = entry.duration_ms
+                group['statement'] = entry.statement
+                group['parameters'] = entry.parameters
+            if entry.plan is not None:
+                group['plan'] = entry.plan
+        result = sorted(groups.values(), key=lambda group: group['total_ms'],
+                        reverse=True)[:limit]
+        for group in result:
+            group['mean_ms'] = group['total_ms'] / group['count']
+            group['routes'] = sorted(group['routes'])
+        return result
+
+
+slow_query_log = (
+    SlowQueryLog(settings.slow_query_ms, settings.slow_query_log_size,
+                 settings.slow_query_explain_rate,
+                 settings.slow_query_explain_timeout_ms)
+    if settings.slow_query_ms is not None else None
+)
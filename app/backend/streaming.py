@@ -0,0 +1,46 @@
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from app.backend.db import read_session_maker
+from app.backend.settings import settings
+
+StreamFormat = Literal['json', 'ndjson']
+
+
+async def stream_rows(query: Select, schema: type[BaseModel],
+                      stream_format: StreamFormat,
+                      fields: list[str] | None) -> AsyncIterator[bytes]:
+    include = None if fields is None else set(fields)
+    # The response outlives the request's dependencies, so the stream
+    # holds its own session and server-side cursor until the last row.
+    async with read_session_maker() as db:
+        result = await db.stream_scalars(
+            query.execution_options(yield_per=settings.stream_batch_size)
+        )
+        if stream_format == 'ndjson':
+            async for rows in result.partitions():
+                yield b''.join(schema.model_validate(row)
+                               .model_dump_json(include=include).encode()
+                               + b'\n' for row in rows)
+            return
+
+        separator = b'['
+        async for rows in result.partitions():
+            yield separator + b','.join(schema.model_validate(row)
+                                        .model_dump_json(include=include)
+                                        .encode() for row in rows)
+            separator = b','
+        yield b']' if separator == b',' else b'[]'
+
+
+def streaming_response(query: Select, schema: type[BaseModel],
+                       stream_format: StreamFormat,
+                       fields: list[str] | None = None,
+                       headers: dict | None = None) -> StreamingResponse:
+    media_type = ('application/x-ndjson' if stream_format == 'ndjson'
+                  else 'application/json')
+    return StreamingResponse(stream_rows(query, schema, stream_format, fields),
+                             media_type=media_type, headers=headers)
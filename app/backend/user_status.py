@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.cache import TTLCache
+from app.backend.notifications import listener
+from app.backend.settings import settings
+from app.models.user import User
+
+CHANNEL = 'user_status'
+
+
+@dataclass(frozen=True)
+class UserStatus:
+    version: int
+    is_active: bool
+    is_admin: bool
+    is_supplier: bool
+    is_customer: bool
+
+
+def notify_changed():
+    # Used in RETURNING, so the notification rides on the write itself and
+    # reaches every worker when the transaction commits.
+    return func.pg_notify(CHANNEL, cast(User.id, String))
+
+
+class UserStatusCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize, ttl)
+        self.generation = 0
+
+    async def get(self, db: AsyncSession, user_id: int) -> UserStatus | None:
+        # Without the listener a revocation would go unnoticed, so every
+        # lookup goes to the database until it is connected again.
+        cached = listener.connected
+        status = self.cache.get(user_id) if cached else None
+        if status is None:
+            generation = self.generation
+            query = select(User.token_version, User.is_active, User.is_admin,
+                           User.is_supplier, User.is_customer)
+            row = (await db.execute(query.where(User.id == user_id))).first()
+            if row is None:
+                return None
+            status = UserStatus(*row)
+            # A change notified while the query ran may not be in this row.
+            if cached and self.generation == generation:
+                self.cache.set(user_id, status)
+        return status
+
+    def invalidate(self, user_id: int) -> None:
+        self.generation += 1
+        self.cache.pop(user_id)
+
+    def reset(self) -> None:
+        self.generation += 1
+        self.cache.clear()
+
+
+user_status = UserStatusCache(settings.user_status_cache_size,
+                              settings.user_status_ttl_seconds)
+listener.subscribe(CHANNEL,
+                   lambda payload: user_status.invalidate(int(payload)),
+                   user_status.reset)
@@ -0,0 +1,54 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.backend.category_tree import category_tree
+from app.backend.conditional import versions_query
+from app.backend.db import async_session_maker, engine, read_engine
+from app.backend.product_cache import product_cache
+from app.backend.product_listing import ProductFilters, ProductListing
+from app.backend.settings import settings
+from app.backend.user_status import user_status
+
+# The resource sets the GET routes ask conditional_response about; each
+# IN list length renders to its own statement.
+HOT_VERSIONS = (('categories',), ('products',), ('reviews',),
+                ('products', 'categories'), ('products', 'reviews'))
+
+
+async def run_hot_statements(db: AsyncSession) -> None:
+    for resources in HOT_VERSIONS:
+        await db.execute(versions_query(*resources))
+    listing = ProductListing(ProductFilters(), None, join_category=True)
+    await listing.fetch(db, None, settings.page_default_limit)
+    await user_status.get(db, 0)
+
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> None:
+    # Every connection is held at once so the pool opens distinct ones, and
+    # each prepares the hot statements in its own asyncpg statement cache.
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(*(
+            stack.enter_async_context(engine.connect())
+            for _ in range(connections)
+        ))
+        for conn in conns:
+            async with AsyncSession(bind=conn) as db:
+                await run_hot_statements(db)
+                await db.rollback()
+
+
+async def warm_up() -> None:
+    # Connections past pool_size are overflow and closed when returned.
+    connections = min(settings.warmup_connections, settings.db_pool_size)
+    await asyncio.gather(*(warm_pool(pool, connections)
+                           for pool in {engine, read_engine}))
+    async with async_session_maker() as db:
+        await category_tree.load(db)
+        await product_cache.warm(db, settings.warmup_products)
+
+
+async def dispose_engines() -> None:
+    for pool in {engine, read_engine}:
+        await pool.dispose()
@@ -0,0 +1,33 @@
+from sqlalchemy import Row, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def guarded_update(db: AsyncSession, model, target, values: dict,
+                         allowed=None, returning=(),
+                         previous=()) -> Row | None:
+    # One round trip: the target row is matched in a CTE and the UPDATE only
+    # applies when `allowed` holds, so the result tells 404 from 403.
+    # Returns None when nothing matched `target`, and a row whose `id` is
+    # None when the update was not allowed. The `previous` columns come back
+    # as previous_<name>; the row lock makes them the values just replaced.
+    matched = (select(model.id,
+                      *(column.label(f'previous_{column.key}')
+                        for column in previous))
+               .where(target)
+               .with_for_update()
+               .cte('target'))
+    updated = (update(model)
+               .where((model.id == matched.c.id) &
+                      (true() if allowed is None else allowed))
+               .values(**values)
+               .returning(model.id, *returning)
+               .cte('updated'))
+    query = (select(matched.c.id.label('target_id'),
+                    *(matched.c[f'previous_{column.key}']
+                      for column in previous),
+                    updated)
+             .select_from(matched)
+             .outerjoin(updated, updated.c.id == matched.c.id))
+    return (await db.execute(
+        query.execution_options(synchronize_session=False)
+    )).first()
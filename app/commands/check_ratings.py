@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import async_session_maker, engine
+from app.models import Product
+from app.models.reviews import Review
+
+
+def review_totals():
+    return (select(Review.product_id,
+                   func.count().label('review_count'),
+                   func.sum(Review.grade).label('grade_sum'))
+            .where(Review.is_active == True)
+            .group_by(Review.product_id)
+            .subquery('review_totals'))
+
+
+async def find_mismatches(db: AsyncSession) -> list:
+    totals = review_totals()
+    expected_count = func.coalesce(totals.c.review_count, 0)
+    expected_sum = func.coalesce(totals.c.grade_sum, 0)
+    query = (select(Product.id, Product.review_count, expected_count,
+                    Product.grade_sum, expected_sum)
+             .outerjoin(totals, totals.c.product_id == Product.id)
+             .where((Product.review_count != expected_count) |
+                    (Product.grade_sum != expected_sum))
+             .order_by(Product.id))
+    return (await db.execute(query)).all()
+
+
+async def recount_ratings(db: AsyncSession, product_ids=None) -> None:
+    totals = review_totals()
+    query = update(Product).values(
+        review_count=func.coalesce(
+            select(totals.c.review_count)
+            .where(totals.c.product_id == Product.id)
+            .scalar_subquery(), 0
+        ),
+        grade_sum=func.coalesce(
+            select(totals.c.grade_sum)
+            .where(totals.c.product_id == Product.id)
+            .scalar_subquery(), 0
+        )
+    )
+    if product_ids is not None:
+        query = query.where(Product.id.in_(product_ids))
+    await db.execute(query.execution_options(synchronize_session=False))
+    await db.commit()
+
+
+async def main(fix: bool) -> int:
+    async with async_session_maker() as db:
+        mismatches = await find_mismatches(db)
+        for product_id, count, expected_count, total, expected_sum \
+                in mismatches:
+            print(f'product {product_id}: review_count {count} '
+                  f'(expected {expected_count}), grade_sum {total} '
+                  f'(expected {expected_sum})')
+        if mismatches and fix:
+            await recount_ratings(db, [row[0] for row in mismatches])
+            print(f'Fixed {len(mismatches)} products')
+    await engine.dispose()
+    if not mismatches:
+        print('Product ratings are consistent')
+    return 1 if mismatches and not fix else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Check products.review_count and products.grade_sum '
+                    'against the active reviews'
+    )
+    parser.add_argument('--fix', action='store_true',
+                        help='recount the products that do not match')
+    sys.exit(asyncio.run(main(parser.parse_args().fix)))
@@ -1,7 +1,35 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routers import category, products, auth, permission, reviews
+from fastapi.responses import PlainTextResponse
+
+from app.backend.metrics import MetricsMiddleware, metrics
+from app.backend.notifications import listener
+from app.backend.responses import FastJSONResponse
+from app.backend.settings import settings
+from app.backend.warmup import dispose_engines, warm_up
+from app.routers import (category, products, auth, permission, reviews,
+                         admin, orders, health)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    # Subscribed first, so writes committed during warmup still invalidate
+    # what it loads.
+    await listener.start()
+    await warm_up()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await listener.close()
+    await dispose_engines()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+if settings.metrics_enabled or settings.slow_query_ms is not None:
+    # The slow-query log takes the route from the request context.
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.get('/')
@@ -9,8 +37,17 @@ async def welcome():
     return {'message': 'My e-commerce app'}
 
 
+@app.get('/metrics', response_class=PlainTextResponse,
+         include_in_schema=False)
+async def prometheus_metrics():
+    return metrics.render()
+
+
 app.include_router(category.router)
 app.include_router(products.router)
 app.include_router(auth.router)
 app.include_router(permission.router)
-app.include_router(reviews.router)
\ No newline at end of file
+app.include_router(reviews.router)
+app.include_router(admin.router)
+app.include_router(orders.router)
+app.include_router(health.router)
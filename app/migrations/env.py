@@ -21,7 +21,8 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.backend.db import Base, DB_URL
-from app.models import category, products, user, reviews
+from app.models import (category, products, user, reviews, resource_version,
+                        orders, category_product_count)
 
 target_metadata = Base.metadata
 
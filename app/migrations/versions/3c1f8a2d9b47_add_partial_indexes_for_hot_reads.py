@@ -0,0 +1,45 @@
+"""Add partial indexes for hot read filters
+
+Revision ID: 3c1f8a2d9b47
+Revises: 15baa8968f9d
+Create Date: 2026-10-17 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f8a2d9b47'
+down_revision: Union[str, Sequence[str], None] = '15baa8968f9d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_listed', 'products', ['id'],
+                        postgresql_where=sa.text('is_active AND stock > 0'),
+                        postgresql_concurrently=True)
+        op.create_index('ix_products_listed_category', 'products',
+                        ['category_id', 'id'],
+                        postgresql_where=sa.text('is_active AND stock > 0'),
+                        postgresql_concurrently=True)
+        op.create_index('ix_reviews_active_product', 'reviews',
+                        ['product_id', 'id'],
+                        postgresql_where=sa.text('is_active'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_reviews_active_product', table_name='reviews',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_products_listed_category', table_name='products',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_products_listed', table_name='products',
+                      postgresql_concurrently=True)
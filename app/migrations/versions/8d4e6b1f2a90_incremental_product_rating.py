@@ -0,0 +1,58 @@
+"""Incremental product rating
+
+Revision ID: 8d4e6b1f2a90
+Revises: 3c1f8a2d9b47
+Create Date: 2026-10-17 11:02:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e6b1f2a90'
+down_revision: Union[str, Sequence[str], None] = '3c1f8a2d9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RATING_EXPRESSION = ('CASE WHEN review_count > 0 '
+                     'THEN grade_sum::double precision / review_count '
+                     'ELSE 0 END')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('review_count', sa.Integer(),
+                                        server_default='0', nullable=False))
+    op.add_column('products', sa.Column('grade_sum', sa.Integer(),
+                                        server_default='0', nullable=False))
+    op.execute("""
+        UPDATE products
+        SET review_count = totals.review_count,
+            grade_sum = totals.grade_sum
+        FROM (SELECT product_id,
+                     count(*) AS review_count,
+                     sum(grade) AS grade_sum
+              FROM reviews
+              WHERE is_active
+              GROUP BY product_id) AS totals
+        WHERE products.id = totals.product_id
+    """)
+    op.drop_column('products', 'rating')
+    op.add_column('products', sa.Column(
+        'rating', sa.Float(),
+        sa.Computed(RATING_EXPRESSION, persisted=True),
+        nullable=False
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'rating')
+    op.add_column('products', sa.Column('rating', sa.Float(), nullable=True))
+    op.execute(f'UPDATE products SET rating = {RATING_EXPRESSION}')
+    op.alter_column('products', 'rating', nullable=False)
+    op.drop_column('products', 'grade_sum')
+    op.drop_column('products', 'review_count')
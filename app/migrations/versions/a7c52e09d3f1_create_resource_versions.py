@@ -0,0 +1,41 @@
+"""Create resource versions
+
+Revision ID: a7c52e09d3f1
+Revises: 8d4e6b1f2a90
+Create Date: 2026-10-17 12:20:05.731944
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c52e09d3f1'
+down_revision: Union[str, Sequence[str], None] = '8d4e6b1f2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    resource_versions = op.create_table('resource_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True),
+              server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.bulk_insert(resource_versions, [
+        {'name': 'categories', 'version': 0},
+        {'name': 'products', 'version': 0},
+        {'name': 'reviews', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resource_versions')
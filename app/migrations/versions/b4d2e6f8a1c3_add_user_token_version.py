@@ -0,0 +1,29 @@
+"""Add user token version
+
+Revision ID: b4d2e6f8a1c3
+Revises: f3a8c1d5e7b2
+Create Date: 2026-10-17 17:31:12.847206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d2e6f8a1c3'
+down_revision: Union[str, Sequence[str], None] = 'f3a8c1d5e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(),
+                                     server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
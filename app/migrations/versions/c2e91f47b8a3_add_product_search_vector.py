@@ -0,0 +1,44 @@
+"""Add product search vector
+
+Revision ID: c2e91f47b8a3
+Revises: a7c52e09d3f1
+Create Date: 2026-10-17 13:41:19.065283
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e91f47b8a3'
+down_revision: Union[str, Sequence[str], None] = 'a7c52e09d3f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("setweight(to_tsvector('english', name), 'A') || "
+                    "setweight(to_tsvector('english', description), 'B')",
+                    persisted=True),
+        nullable=True
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_search_vector', 'products',
+                        ['search_vector'],
+                        postgresql_using='gin',
+                        postgresql_where=sa.text('is_active AND stock > 0'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_search_vector', table_name='products',
+                      postgresql_concurrently=True)
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,42 @@
+"""Create category product counts
+
+Revision ID: d9f3b7a2c5e4
+Revises: b4d2e6f8a1c3
+Create Date: 2026-10-17 18:44:26.093518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f3b7a2c5e4'
+down_revision: Union[str, Sequence[str], None] = 'b4d2e6f8a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('category_product_counts',
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('in_stock', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category_id')
+    )
+    op.execute("""
+        INSERT INTO category_product_counts (category_id, in_stock)
+        SELECT category_id, count(*)
+        FROM products
+        WHERE is_active AND stock > 0
+        GROUP BY category_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('category_product_counts')
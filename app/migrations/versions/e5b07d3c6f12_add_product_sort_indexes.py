@@ -0,0 +1,42 @@
+"""Add product sort indexes
+
+Revision ID: e5b07d3c6f12
+Revises: c2e91f47b8a3
+Create Date: 2026-10-17 14:55:02.318470
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b07d3c6f12'
+down_revision: Union[str, Sequence[str], None] = 'c2e91f47b8a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_products_listed_price': ['price', 'id'],
+    'ix_products_listed_rating': ['rating', 'id'],
+    'ix_products_listed_category_price': ['category_id', 'price', 'id'],
+    'ix_products_listed_category_rating': ['category_id', 'rating', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'products', columns,
+                            postgresql_where=sa.text('is_active AND stock > 0'),
+                            postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in reversed(INDEXES):
+            op.drop_index(name, table_name='products',
+                          postgresql_concurrently=True)
@@ -0,0 +1,12 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.backend.db import Base, foreign_key
+
+
+class CategoryProductCount(Base):
+    __tablename__ = 'category_product_counts'
+
+    category_id: Mapped[foreign_key('categories.id')] = mapped_column(
+        unique=True
+    )
+    in_stock: Mapped[int] = mapped_column(default=0, server_default='0')
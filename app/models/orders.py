@@ -0,0 +1,38 @@
+from datetime import datetime, UTC
+
+from sqlalchemy import DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.backend.db import Base, foreign_key
+
+
+class Order(Base):
+    __tablename__ = 'orders'
+    __table_args__ = (
+        Index('ix_orders_user', 'user_id', 'id'),
+    )
+
+    status: Mapped[str] = mapped_column(default='placed',
+                                        server_default='placed')
+    total: Mapped[int]
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        server_default=func.now()
+    )
+
+    user_id: Mapped[foreign_key('users.id')]
+    items = relationship('OrderItem', uselist=True, lazy='raise')
+
+
+class OrderItem(Base):
+    __tablename__ = 'order_items'
+    __table_args__ = (
+        Index('ix_order_items_order', 'order_id'),
+    )
+
+    quantity: Mapped[int]
+    price: Mapped[int]
+
+    order_id: Mapped[foreign_key('orders.id')]
+    product_id: Mapped[foreign_key('products.id')]
@@ -1,11 +1,33 @@
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.backend.db import Base, bool_with_default, foreign_key
-from sqlalchemy import ForeignKey
+from sqlalchemy import Computed, ForeignKey, Index, literal_column, text
+
+SEARCH_CONFIG = 'english'
 
 
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        Index('ix_products_listed', 'id',
+              postgresql_where=text('is_active AND stock > 0')),
+        Index('ix_products_listed_category', 'category_id', 'id',
+              postgresql_where=text('is_active AND stock > 0')),
+        Index('ix_products_listed_price', 'price', 'id',
+              postgresql_where=text('is_active AND stock > 0')),
+        Index('ix_products_listed_rating', 'rating', 'id',
+              postgresql_where=text('is_active AND stock > 0')),
+        Index('ix_products_listed_category_price',
+              'category_id', 'price', 'id',
+              postgresql_where=text('is_active AND stock > 0')),
+        Index('ix_products_listed_category_rating',
+              'category_id', 'rating', 'id',
+              postgresql_where=text('is_active AND stock > 0')),
+        Index('ix_products_search_vector', 'search_vector',
+              postgresql_using='gin',
+              postgresql_where=text('is_active AND stock > 0')),
+    )
 
     name: Mapped[str]
     slug: Mapped[str] = mapped_column(unique=True, index=True)
@@ -13,11 +35,29 @@ class Product(Base):
     price: Mapped[int]
     image_url: Mapped[str]
     stock: Mapped[int]
-    rating: Mapped[float]
+    review_count: Mapped[int] = mapped_column(default=0, server_default='0')
+    grade_sum: Mapped[int] = mapped_column(default=0, server_default='0')
+    rating: Mapped[float] = mapped_column(
+        Computed('CASE WHEN review_count > 0 '
+                 'THEN grade_sum::double precision / review_count '
+                 'ELSE 0 END', persisted=True)
+    )
     is_active: Mapped[bool_with_default(True)]
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+                 f"setweight(to_tsvector('{SEARCH_CONFIG}', description), "
+                 f"'B')", persisted=True),
+        deferred=True
+    )
 
     category_id: Mapped[foreign_key('categories.id')]
     supplier_id: Mapped[foreign_key('users.id') | None]
     category = relationship('Category',
                             back_populates='products',
-                            uselist=False)
\ No newline at end of file
+                            uselist=False)
+
+
+# Rendered as a constant: the partial indexes' `stock > 0` predicate cannot
+# be matched against a bind parameter once Postgres uses a generic plan.
+IN_STOCK = Product.stock > literal_column('0')
@@ -0,0 +1,18 @@
+from datetime import datetime, UTC
+
+from sqlalchemy import DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.backend.db import Base, unique_str
+
+
+class ResourceVersion(Base):
+    __tablename__ = 'resource_versions'
+
+    name: Mapped[unique_str]
+    version: Mapped[int] = mapped_column(default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(UTC),
+        server_default=func.now()
+    )
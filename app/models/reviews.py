@@ -1,6 +1,6 @@
 from datetime import datetime, UTC
 
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.backend.db import Base, bool_with_default, foreign_key
@@ -8,6 +8,10 @@ from app.backend.db import Base, bool_with_default, foreign_key
 
 class Review(Base):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        Index('ix_reviews_active_product', 'product_id', 'id',
+              postgresql_where=text('is_active')),
+    )
 
     comment: Mapped[str | None]
     grade: Mapped[int]
@@ -16,3 +16,4 @@ class User(Base):
     is_admin: Mapped[bool_with_default(False)]
     is_supplier: Mapped[bool_with_default(False)]
     is_customer: Mapped[bool_with_default(True)]
+    token_version: Mapped[int] = mapped_column(default=0, server_default='0')
@@ -0,0 +1,38 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.backend.product_cache import product_cache
+from app.backend.slow_queries import slow_query_log
+from app.routers.auth import get_current_user, token_cache
+
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+
+
+def admin_user(get_user: Annotated[dict, Depends(get_current_user)]):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You don`t have admin permission'
+        )
+    return get_user
+
+
+@router.get('/token_cache')
+async def token_cache_stats(get_user: Annotated[dict, Depends(admin_user)]):
+    return token_cache.stats()
+
+
+@router.get('/product_cache')
+async def product_cache_stats(get_user: Annotated[dict, Depends(admin_user)]):
+    return product_cache.stats()
+
+
+@router.get('/slow_queries')
+async def slow_queries(get_user: Annotated[dict, Depends(admin_user)],
+                       limit: Annotated[int, Query(ge=1, le=100)] = 20):
+    if slow_query_log is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Slow query log is disabled')
+    return slow_query_log.worst(limit)
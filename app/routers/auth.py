@@ -2,34 +2,46 @@ from datetime import timedelta, datetime, UTC
 from typing import Annotated
 
 import jwt
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.cache import TTLCache
 from app.backend.db_depends import get_db
+from app.backend.passwords import password_hasher
+from app.backend.rate_limit import login_limiter, signup_limiter
 from app.backend.settings import settings
+from app.backend.user_status import user_status
 from app.models.user import User
 from app.schemas import CreateUser
 
 router = APIRouter(prefix='/auth', tags=['auth'])
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+token_cache = TTLCache(settings.token_cache_size)
 
 
 async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)],
                             username: str, password: str):
     select_user_query = select(User).where(User.username == username)
     user = await db.scalar(select_user_query)
-    if not (user and
-            bcrypt_context.verify(password, user.hashed_password) and
-            user.is_active):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+    if not (verified and user.is_active):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Invalid authentication credentials',
             headers={'WWW-Authenticate': 'Bearer'}
         )
+    if new_hash is not None:
+        rehash_query = (update(User)
+                        .where(User.id == user.id)
+                        .values(hashed_password=new_hash))
+        await db.execute(rehash_query)
+        await db.commit()
     return user
 
 
@@ -38,13 +50,15 @@ def create_access_token(username: str,
                         is_admin: bool,
                         is_supplier: bool,
                         is_customer: bool,
-                        expires_delta: timedelta):
+                        expires_delta: timedelta,
+                        token_version: int = 0):
     payload = {
         'sub': username,
         'id': user_id,
         'is_admin': is_admin,
         'is_supplier': is_supplier,
         'is_customer': is_customer,
+        'ver': token_version,
         'exp': int((datetime.now(UTC) + expires_delta).timestamp())
     }
     return jwt.encode(payload,
@@ -52,7 +66,7 @@ def create_access_token(username: str,
                       algorithm=settings.algorithm)
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+def decode_access_token(token: str) -> tuple[dict, int]:
     try:
         payload = jwt.decode(token,
                              settings.secret_key,
@@ -90,24 +104,46 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
             'id': user_id,
             'is_admin': is_admin,
             'is_supplier': is_supplier,
-            'is_customer': is_customer
-        }
+            'is_customer': is_customer,
+            'token_version': payload.get('ver', 0)
+        }, expire
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Token expired!'
         )
-    except jwt.exceptions:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Could not validate user'
         )
 
 
+async def get_current_user(db: Annotated[AsyncSession, Depends(get_db)],
+                           token: Annotated[str, Depends(oauth2_scheme)]):
+    user = token_cache.get(token)
+    if user is None:
+        user, expire = decode_access_token(token)
+        token_cache.set(token, user, expires_at=expire)
+    # Deactivation and role changes bump the user's token version, so
+    # tokens issued before them stop working at once.
+    current = await user_status.get(db, user['id'])
+    if (current is None or not current.is_active or
+            current.version != user['token_version']):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Token has been revoked',
+            headers={'WWW-Authenticate': 'Bearer'}
+        )
+    return user
+
+
 @router.post('/token')
 async def login(db: Annotated[AsyncSession, Depends(get_db)],
+                request: Request,
                 form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    await login_limiter.check(request, form_data.username)
     user = await authenticate_user(db, form_data.username,
                                    form_data.password)
     access_token = create_access_token(
@@ -116,7 +152,8 @@ async def login(db: Annotated[AsyncSession, Depends(get_db)],
         user.is_admin,
         user.is_supplier,
         user.is_customer,
-        expires_delta=timedelta(seconds=settings.token_expires_seconds)
+        expires_delta=timedelta(seconds=settings.token_expires_seconds),
+        token_version=user.token_version
     )
     return {'access_token': access_token,
             'token_type': 'bearer'}
@@ -129,12 +166,15 @@ async def read_current_user(user: dict = Depends(get_current_user)):
 
 @router.post('/', status_code=status.HTTP_201_CREATED)
 async def create_user(db: Annotated[AsyncSession, Depends(get_db)],
+                      request: Request,
                       create_user: CreateUser):
+    await signup_limiter.check(request, create_user.username)
     create_user_dict = create_user.model_dump()
-    query = insert(User).values(
-        hashed_password=bcrypt_context.hash(create_user_dict.pop('password')),
-        **create_user_dict
+    hashed_password = await password_hasher.hash(
+        create_user_dict.pop('password')
     )
+    query = insert(User).values(hashed_password=hashed_password,
+                                **create_user_dict)
     await db.execute(query)
     await db.commit()
     return {'status_code': status.HTTP_201_CREATED,
@@ -1,23 +1,52 @@
 from typing import Annotated
 
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Request, Response
 from slugify import slugify
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.category_counts import load_tree
+from app.backend.category_tree import category_tree, notify_changed
+from app.backend.conditional import bump_versions, conditional_response
+from app.backend.db_depends import get_db, get_read_db
+from app.backend.pagination import PageLimit, keyset, page
+from app.backend.settings import settings
 from app.models import Category
 from app.routers.auth import get_current_user
-from app.schemas import CreateCategory
+from app.schemas import CategoryNode, CategoryRead, CreateCategory, Page
 
 router = APIRouter(prefix='/categories', tags=['category'])
 
 
-@router.get('/')
-async def get_all_categories(db: Annotated[AsyncSession, Depends(get_db)]):
+@router.get('/', response_model=Page[CategoryRead])
+async def get_all_categories(db: Annotated[AsyncSession, Depends(get_read_db)],
+                             request: Request,
+                             response: Response,
+                             cursor: str | None = None,
+                             limit: PageLimit = settings.page_default_limit):
+    not_modified = await conditional_response(request, response, db,
+                                              'categories')
+    if not_modified is not None:
+        return not_modified
     query = select(Category).where(Category.is_active == True)
+    query = keyset(query, (Category.id,), cursor, limit)
     categories = (await db.scalars(query)).all()
-    return categories
+    await db.close()
+    return page(categories, limit)
+
+
+@router.get('/tree', response_model=list[CategoryNode])
+async def category_tree_counts(db: Annotated[AsyncSession,
+                                             Depends(get_read_db)],
+                               request: Request,
+                               response: Response):
+    not_modified = await conditional_response(request, response, db,
+                                              'categories', 'products')
+    if not_modified is not None:
+        return not_modified
+    tree = await load_tree(db)
+    await db.close()
+    return tree
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED)
@@ -30,11 +59,14 @@ async def create_category(db: Annotated[AsyncSession, Depends(get_db)],
             detail='You must be admin user for this'
         )
 
-    query = insert(Category).values(name=create_category.name,
-                                    parent_id=create_category.parent_id,
-                                    slug=slugify(create_category.name))
+    query = (insert(Category).values(name=create_category.name,
+                                     parent_id=create_category.parent_id,
+                                     slug=slugify(create_category.name))
+             .returning(notify_changed()))
     await db.execute(query)
+    await bump_versions(db, 'categories')
     await db.commit()
+    await category_tree.load(db)
     return {'status_code': status.HTTP_201_CREATED,
             'transaction': 'Successful'}
 
@@ -50,16 +82,19 @@ async def update_category(db: Annotated[AsyncSession, Depends(get_db)],
             detail='You must be admin user for this'
         )
 
-    query = select(Category).where((Category.slug == category_slug) &
-                                   (Category.is_active == True))
-    category = await db.scalar(query)
-    if category is None:
+    query = (update(Category)
+             .where((Category.slug == category_slug) &
+                    (Category.is_active == True))
+             .values(name=update_category.name,
+                     slug=slugify(update_category.name),
+                     parent_id=update_category.parent_id)
+             .returning(Category.id, notify_changed()))
+    if await db.scalar(query) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There is no category found')
-    category.name = update_category.name
-    category.slug = slugify(update_category.name)
-    category.parent_id = update_category.parent_id
+    await bump_versions(db, 'categories')
     await db.commit()
+    await category_tree.load(db)
     return {'status_code': status.HTTP_200_OK,
             'transaction': 'Category update is successful'}
 
@@ -74,13 +109,16 @@ async def delete_category(db: Annotated[AsyncSession, Depends(get_db)],
             detail='You must be admin user for this'
         )
 
-    query = select(Category).where(Category.slug == category_slug,
-                                   Category.is_active == True)
-    category = await db.scalar(query)
-    if category is None:
+    query = (update(Category)
+             .where((Category.slug == category_slug) &
+                    (Category.is_active == True))
+             .values(is_active=False)
+             .returning(Category.id, notify_changed()))
+    if await db.scalar(query) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There is no category found')
-    category.is_active = False
+    await bump_versions(db, 'categories')
     await db.commit()
+    await category_tree.load(db)
     return {'status_code': status.HTTP_200_OK,
             'transaction': 'Category delete is successfull'}
\ No newline at end of file
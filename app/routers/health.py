@@ -0,0 +1,33 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db_depends import get_db
+from app.backend.settings import settings
+
+
+router = APIRouter(prefix='/health', tags=['health'])
+
+
+@router.get('/live')
+async def live():
+    return {'status': 'alive'}
+
+
+@router.get('/ready')
+async def ready(db: Annotated[AsyncSession, Depends(get_db)],
+                request: Request):
+    if not getattr(request.app.state, 'ready', False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail='Warming up')
+    try:
+        async with asyncio.timeout(settings.health_timeout_seconds):
+            await db.execute(text('SELECT 1'))
+    except (TimeoutError, OSError, DBAPIError):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail='Database is unavailable')
+    return {'status': 'ready'}
@@ -0,0 +1,151 @@
+import logging
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import Integer, column, func, insert, literal, select, true, \
+    update, values
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.backend.category_counts import count_deltas_from
+from app.backend.conditional import bump_versions
+from app.backend.db_depends import get_db
+from app.backend.pagination import PageLimit, keyset, page
+from app.backend.product_cache import notify_changed, product_cache
+from app.backend.settings import settings
+from app.models import Product
+from app.models.orders import Order, OrderItem
+from app.routers.auth import get_current_user
+from app.schemas import CreateOrder, OrderRead, Page
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix='/orders', tags=['orders'])
+
+
+def checkout_query(user_id: int, cart: dict[int, int]):
+    cart_values = (values(column('product_id', Integer),
+                          column('quantity', Integer),
+                          name='cart')
+                   .data(sorted(cart.items())))
+    # Rows are locked in id order before the decrement, so concurrent
+    # carts sharing products queue up instead of deadlocking.
+    locked = (select(Product.id)
+              .where(Product.id.in_(list(cart)) &
+                     (Product.is_active == True))
+              .order_by(Product.id)
+              .with_for_update(key_share=True)
+              .cte('locked')
+              .prefix_with('MATERIALIZED'))
+    reserved = (update(Product)
+                .where((Product.id == locked.c.id) &
+                       (Product.id == cart_values.c.product_id) &
+                       (Product.stock >= cart_values.c.quantity))
+                .values(stock=Product.stock - cart_values.c.quantity)
+                .returning(Product.id, Product.slug, Product.price,
+                           Product.stock, Product.category_id,
+                           cart_values.c.quantity,
+                           notify_changed(Product.slug).label('notified'))
+                .cte('reserved'))
+    # The order is only inserted when every cart line was reserved.
+    new_order = (insert(Order)
+                 .from_select(['user_id', 'total'],
+                              select(literal(user_id),
+                                     func.sum(reserved.c.price *
+                                              reserved.c.quantity))
+                              .having(func.count() == len(cart)))
+                 .returning(Order.id)
+                 .cte('new_order'))
+    new_items = (insert(OrderItem)
+                 .from_select(['order_id', 'product_id', 'quantity', 'price'],
+                              select(new_order.c.id, reserved.c.id,
+                                     reserved.c.quantity, reserved.c.price))
+                 .cte('new_items'))
+    # Reserved rows had stock before, so only a sell-out delists them.
+    sold_out = count_deltas_from(
+        select(reserved.c.category_id, -func.count())
+        .select_from(reserved)
+        .join(new_order, true())
+        .where(reserved.c.stock == 0)
+        .group_by(reserved.c.category_id)
+    ).cte('sold_out')
+    # Counts, cache notifications and the order all happen in this one
+    # statement, so the product row locks are only held until the commit
+    # right after it. `notified` is selected to keep pg_notify evaluated.
+    return (select(reserved.c.id, reserved.c.slug, reserved.c.price,
+                   reserved.c.quantity, reserved.c.notified,
+                   new_order.c.id.label('order_id'))
+            .select_from(reserved)
+            .outerjoin(new_order, true())
+            .add_cte(new_items)
+            .add_cte(sold_out))
+
+
+@router.post('/')
+async def checkout(db: Annotated[AsyncSession, Depends(get_db)],
+                   create_order: CreateOrder,
+                   user: Annotated[dict, Depends(get_current_user)]):
+    cart = {}
+    for item in create_order.items:
+        cart[item.product_id] = cart.get(item.product_id, 0) + item.quantity
+
+    rows = (await db.execute(checkout_query(user.get('id'), cart))).all()
+    if not rows or rows[0].order_id is None:
+        await db.rollback()
+        missing = sorted(set(cart) - {row.id for row in rows})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f'Not enough stock for products: '
+                   f'{", ".join(map(str, missing))}'
+        )
+    await product_cache.forget(db, *(row.slug for row in rows))
+    await db.commit()
+    await product_cache.committed(db)
+    # Every checkout bumps the same version row, so it gets its own short
+    # transaction instead of queueing checkouts that still hold product locks.
+    # The order is already placed, so a failed bump is only logged: an
+    # error here would be retried into a duplicate order. Listings then
+    # keep the old ETag until the next products write bumps it.
+    try:
+        await bump_versions(db, 'products')
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        logger.exception('products version bump failed after checkout')
+    return {'status_code': status.HTTP_201_CREATED,
+            'transaction': 'Order placed successfully',
+            'order_id': rows[0].order_id,
+            'total': sum(row.price * row.quantity for row in rows)}
+
+
+# Orders are read from the primary so a just-placed order is always visible.
+@router.get('/', response_model=Page[OrderRead])
+async def my_orders(db: Annotated[AsyncSession, Depends(get_db)],
+                    user: Annotated[dict, Depends(get_current_user)],
+                    cursor: str | None = None,
+                    limit: PageLimit = settings.page_default_limit):
+    query = (select(Order)
+             .where(Order.user_id == user.get('id'))
+             .options(selectinload(Order.items)))
+    query = keyset(query, (Order.id,), cursor, limit, descending=True)
+    orders = (await db.scalars(query)).all()
+    await db.close()
+    return page(orders, limit)
+
+
+@router.get('/{order_id}', response_model=OrderRead)
+async def order_detail(db: Annotated[AsyncSession, Depends(get_db)],
+                       user: Annotated[dict, Depends(get_current_user)],
+                       order_id: int):
+    query = (select(Order)
+             .where(Order.id == order_id)
+             .options(selectinload(Order.items)))
+    if not user.get('is_admin'):
+        query = query.where(Order.user_id == user.get('id'))
+    order = await db.scalar(query)
+    await db.close()
+    if order is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Order not found')
+    return order
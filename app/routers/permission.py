@@ -5,6 +5,7 @@ from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.backend.db_depends import get_db
+from app.backend.user_status import notify_changed, user_status
 from app.models.user import User
 from app.routers.auth import get_current_user
 
@@ -24,23 +25,24 @@ async def supplier_permission(
             detail='You don`t have admin permission'
         )
 
-    query = select(User).where(User.id == user_id)
-    user = await db.scalar(query)
-
-    if not user or not user.is_active:
+    # SET expressions see the old row, so is_customer takes the previous
+    # is_supplier value.
+    query = (update(User)
+             .where((User.id == user_id) & (User.is_active == True))
+             .values(is_supplier=~User.is_supplier,
+                     is_customer=User.is_supplier,
+                     token_version=User.token_version + 1)
+             .returning(User.is_supplier, notify_changed()))
+    is_supplier = await db.scalar(query)
+    if is_supplier is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='User not found'
         )
-    is_supplier = user.is_supplier
-    query = (update(User)
-             .where(User.id == user_id)
-             .values(is_supplier=not is_supplier,
-                     is_customer=is_supplier))
-    await db.execute(query)
     await db.commit()
+    user_status.invalidate(user_id)
     return {'status_code': status.HTTP_200_OK,
-            'detail': f'User is no{" longer" if is_supplier else "w"}'
+            'detail': f'User is no{"w" if is_supplier else " longer"}'
                       f' supplier' }
 
 
@@ -72,9 +74,12 @@ async def delete_user(db: Annotated[AsyncSession, Depends(get_db)],
     if user.is_active:
         query = (update(User)
                  .where(User.id == user_id)
-                 .values(is_active=False))
+                 .values(is_active=False,
+                         token_version=User.token_version + 1)
+                 .returning(notify_changed()))
         await db.execute(query)
         await db.commit()
+        user_status.invalidate(user_id)
         return {'status_code': status.HTTP_200_OK,
                 'detail': 'User is deleted'}
     else:
@@ -1,32 +1,70 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import (APIRouter, Depends, status, HTTPException, Query, Request,
+                     Response)
 from slugify import slugify
-from sqlalchemy import insert, select
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
 
-from app.backend.db_depends import get_db
+from app.backend.bulk_import import ProductImporter, read_records
+from app.backend.category_counts import (CountDeltas,
+                                         adjust_category_counts, listed)
+from app.backend.category_tree import category_tree
+from app.backend.conditional import bump_versions, conditional_response
+from app.backend.db_depends import get_db, get_read_db
+from app.backend.fieldsets import parse_fields
+from app.backend.pagination import PageLimit, keyset, page
+from app.backend.product_cache import product_cache
+from app.backend.product_listing import ProductFilters, ProductListing
+from app.backend.responses import FastJSONResponse
+from app.backend.settings import settings
+from app.backend.streaming import StreamFormat, streaming_response
+from app.backend.writes import guarded_update
 from app.models import Product, Category
+from app.models.products import IN_STOCK, SEARCH_CONFIG
 from app.routers.auth import get_current_user
-from app.schemas import CreateProduct
+from app.schemas import CreateProduct, Page, ProductPage, ProductRead
 
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
-@router.get('/')
-async def all_products(db: Annotated[AsyncSession, Depends(get_db)]):
-    query = select(Product).join(Category).where(
-        (Product.is_active == True) &
-        (Product.stock > 0) &
-        (Category.is_active == True)
-    )
-    products = (await db.scalars(query)).all()
-    if not products:
+def owned_by(user: dict):
+    # Suppliers may only change their own products.
+    if user.get('is_supplier'):
+        return Product.supplier_id == user.get('id')
+    return None
+
+
+@router.get('/', response_model=ProductPage)
+async def all_products(db: Annotated[AsyncSession, Depends(get_read_db)],
+                       request: Request,
+                       response: Response,
+                       filters: Annotated[ProductFilters, Depends()],
+                       cursor: str | None = None,
+                       limit: PageLimit = settings.page_default_limit,
+                       stream: StreamFormat | None = None,
+                       fields: str | None = None):
+    fields = parse_fields(fields, ProductRead)
+    not_modified = await conditional_response(request, response, db,
+                                              'products', 'categories')
+    if not_modified is not None:
+        return not_modified
+    listing = ProductListing(filters, fields, join_category=True)
+    if stream is not None:
+        # Dependency teardown only runs after the body is sent; the stream
+        # reads on its own connection.
+        await db.close()
+        # A returned response does not carry the injected response's
+        # validators over by itself.
+        return streaming_response(listing.stream_query(), ProductRead,
+                                  stream, fields, dict(response.headers))
+    products, facets = await listing.fetch(db, cursor, limit)
+    await db.close()
+    if not (products or facets):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There are no products')
-    return products
+    return listing.page(products, facets, limit, dict(response.headers))
 
 
 @router.post('/')
@@ -48,54 +86,121 @@ async def create_product(db: Annotated[AsyncSession, Depends(get_db)],
             detail='There is no category found'
         )
     query = insert(Product).values(slug=slugify(create_product.name),
-                                   rating=.0,
                                    supplier_id=get_user.get('id'),
                                    **create_product.model_dump())
     await db.execute(query)
+    deltas = CountDeltas()
+    deltas.add(create_product.category_id, listed(True, create_product.stock))
+    await adjust_category_counts(db, deltas)
+    await bump_versions(db, 'products')
     await db.commit()
     return {'status_code': status.HTTP_201_CREATED,
             'transaction': 'Successful'}
 
 
-@router.get('/{category_slug}')
-async def product_by_category(db: Annotated[AsyncSession, Depends(get_db)],
-                              category_slug: str):
-    check_category_query = (select(Category)
-                            .where(Category.slug == category_slug))
-    main_category = await db.scalar(check_category_query)
-    if main_category is None or not main_category.is_active:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail='Category not found')
-    base_query = select(Category.id).where(Category.slug == category_slug)
-    cte = base_query.cte(name='subcategories', recursive=True)
-    category_alias = aliased(Category)
-    recursive = (select(category_alias.id)
-                 .where((category_alias.parent_id == cte.c.id) &
-                        (category_alias.is_active == True)))
-    subcategories_query = cte.union_all(recursive)
-    categories = (await db.scalars(select(subcategories_query))).all()
-    select_products_query = select(Product).where(
-        Product.category_id.in_(categories) &
+@router.post('/import')
+async def import_products(db: Annotated[AsyncSession, Depends(get_db)],
+                          request: Request,
+                          get_user: Annotated[dict, Depends(get_current_user)]):
+    if not (get_user.get('is_admin') or get_user.get('is_supplier')):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='You are not authorized to use this method'
+        )
+
+    importer = ProductImporter(db, get_user.get('id'))
+    async for line, record in read_records(request):
+        await importer.add(line, record)
+    await importer.flush()
+    return {'status_code': status.HTTP_200_OK,
+            **importer.report()}
+
+
+@router.get('/search', response_model=Page[ProductRead])
+async def search_products(db: Annotated[AsyncSession, Depends(get_read_db)],
+                          request: Request,
+                          response: Response,
+                          q: Annotated[str, Query(min_length=1,
+                                                  max_length=200)],
+                          category: str | None = None,
+                          cursor: str | None = None,
+                          limit: PageLimit = settings.page_default_limit):
+    not_modified = await conditional_response(request, response, db,
+                                              'products', 'categories')
+    if not_modified is not None:
+        return not_modified
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Product.search_vector, ts_query).label('rank')
+    query = select(Product, rank).join(Category).where(
+        Product.search_vector.op('@@')(ts_query) &
         (Product.is_active == True) &
-        (Product.stock > 0)
+        IN_STOCK &
+        (Category.is_active == True)
     )
-    products = (await db.scalars(select_products_query)).all()
-    if not products:
+    if category is not None:
+        await category_tree.refresh_if_stale()
+        categories = category_tree.subtree(category)
+        if categories is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail='Category not found')
+        query = query.where(Product.category_id.in_(categories))
+    query = keyset(query, (rank, Product.id), cursor, limit,
+                   descending=True)
+    rows = (await db.execute(query)).all()
+    await db.close()
+    result = page(rows, limit, key=lambda row: (row.rank, row.Product.id))
+    result['items'] = [row.Product for row in result['items']]
+    return result
+
+
+@router.get('/{category_slug}', response_model=ProductPage)
+async def product_by_category(db: Annotated[AsyncSession, Depends(get_read_db)],
+                              request: Request,
+                              response: Response,
+                              category_slug: str,
+                              filters: Annotated[ProductFilters, Depends()],
+                              cursor: str | None = None,
+                              limit: PageLimit = settings.page_default_limit,
+                              fields: str | None = None):
+    fields = parse_fields(fields, ProductRead)
+    not_modified = await conditional_response(request, response, db,
+                                              'products', 'categories')
+    if not_modified is not None:
+        return not_modified
+    await category_tree.refresh_if_stale()
+    categories = category_tree.subtree(category_slug)
+    if categories is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail='Category not found')
+    listing = ProductListing(filters, fields,
+                             Product.category_id.in_(categories))
+    products, facets = await listing.fetch(db, cursor, limit)
+    await db.close()
+    if not (products or facets):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There are no products')
-    return products
+    return listing.page(products, facets, limit, dict(response.headers))
 
 
-@router.get('/detail/{product_slug}')
-async def product_detail(db: Annotated[AsyncSession, Depends(get_db)],
-                         product_slug: str):
-    query = select(Product).where((Product.slug == product_slug) &
-                                  (Product.is_active == True) &
-                                  (Product.stock > 0))
-    product = await db.scalar(query)
-    if product is None:
+@router.get('/detail/{product_slug}', response_model=ProductRead)
+async def product_detail(db: Annotated[AsyncSession, Depends(get_read_db)],
+                         request: Request,
+                         response: Response,
+                         product_slug: str,
+                         fields: str | None = None):
+    fields = parse_fields(fields, ProductRead)
+    not_modified = await conditional_response(request, response, db,
+                                              'products')
+    if not_modified is not None:
+        return not_modified
+    await db.close()
+    product = await product_cache.get(product_slug)
+    if product is None or product['stock'] <= 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There is not product found')
+    if fields is not None:
+        return FastJSONResponse({field: product[field] for field in fields},
+                                headers=dict(response.headers))
     return product
 
 
@@ -110,24 +215,34 @@ async def update_product(db: Annotated[AsyncSession, Depends(get_db)],
             detail='You are not authorized to use this method'
         )
 
-    check_product_query = (select(Product)
-                           .where(Product.slug == product_slug))
-    product = await db.scalar(check_product_query)
-
+    product = await guarded_update(
+        db, Product, Product.slug == product_slug,
+        {**update_product.model_dump(), 'slug': slugify(update_product.name)},
+        allowed=owned_by(get_user),
+        returning=(Product.category_id, Product.is_active, Product.stock),
+        previous=(Product.category_id, Product.is_active, Product.stock,
+                  Product.slug)
+    )
     if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There is not product found')
-    if (get_user.get('is_supplier') and
-        not product.supplier_id == get_user.get('id')):
+    if product.id is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail='You are not authorized to use this method'
         )
 
-    for k, v in update_product.model_dump().items():
-        setattr(product, k, v)
-    product.slug = slugify(update_product.name)
+    deltas = CountDeltas()
+    deltas.moved(product.previous_category_id,
+                 listed(product.previous_is_active, product.previous_stock),
+                 product.category_id,
+                 listed(product.is_active, product.stock))
+    await adjust_category_counts(db, deltas)
+    await product_cache.invalidate(db, product.previous_slug,
+                                   slugify(update_product.name))
+    await bump_versions(db, 'products')
     await db.commit()
+    await product_cache.committed(db)
     return {'status_code': status.HTTP_200_OK,
             'transaction': 'Product update is successful'}
 
@@ -142,21 +257,29 @@ async def delete_product(db: Annotated[AsyncSession, Depends(get_db)],
             detail='You are not authorized to use this method'
         )
 
-    check_product_query = (select(Product)
-                           .where((Product.slug == product_slug) &
-                                  (Product.is_active == True)))
-    product = await db.scalar(check_product_query)
+    product = await guarded_update(
+        db, Product,
+        (Product.slug == product_slug) & (Product.is_active == True),
+        {'is_active': False},
+        allowed=owned_by(get_user),
+        previous=(Product.category_id, Product.stock)
+    )
     if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail='There is not product found')
-    if (get_user.get('is_supplier') and
-        not product.supplier_id == get_user.get('id')):
+    if product.id is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail='You are not authorized to use this method'
         )
 
-    product.is_active = False
+    deltas = CountDeltas()
+    deltas.add(product.previous_category_id,
+               -listed(True, product.previous_stock))
+    await adjust_category_counts(db, deltas)
+    await product_cache.invalidate(db, product_slug)
+    await bump_versions(db, 'products')
     await db.commit()
+    await product_cache.committed(db)
     return {'status_code': status.HTTP_200_OK,
             'transaction': 'Product delete is successful'}
@@ -1,38 +1,63 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, insert, update, func
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from app.backend.db_depends import get_db
+from app.backend.conditional import bump_versions, conditional_response
+from app.backend.db_depends import get_db, get_read_db
+from app.backend.pagination import PageLimit, keyset, page
+from app.backend.product_cache import product_cache
+from app.backend.settings import settings
+from app.backend.streaming import StreamFormat, streaming_response
 from app.models import Product
 from app.models.reviews import Review
 from app.routers.auth import get_current_user
-from app.schemas import CreateReview
+from app.schemas import CreateReview, Page, ReviewRead
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
 
-@router.get('/')
-async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
+@router.get('/', response_model=Page[ReviewRead])
+async def all_reviews(db: Annotated[AsyncSession, Depends(get_read_db)],
+                      request: Request,
+                      response: Response,
+                      cursor: str | None = None,
+                      limit: PageLimit = settings.page_default_limit,
+                      stream: StreamFormat | None = None):
+    not_modified = await conditional_response(request, response, db,
+                                              'reviews')
+    if not_modified is not None:
+        return not_modified
     query = select(Review).where(Review.is_active == True)
+    if stream is not None:
+        await db.close()
+        return streaming_response(query.order_by(Review.id), ReviewRead,
+                                  stream, headers=dict(response.headers))
+    query = keyset(query, (Review.id,), cursor, limit)
     reviews = (await db.scalars(query)).all()
+    await db.close()
     if not reviews:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='There are no reviews'
         )
-    return reviews
+    return page(reviews, limit)
 
 
-@router.get('/{product_slug}')
-async def products_reviews(db: Annotated[AsyncSession, Depends(get_db)],
-                           product_slug: str):
-    select_product_query = (select(Product)
-                            .where((Product.slug == product_slug) &
-                                   (Product.is_active == True)))
-    product = await db.scalar(select_product_query)
+@router.get('/{product_slug}', response_model=Page[ReviewRead])
+async def products_reviews(db: Annotated[AsyncSession, Depends(get_read_db)],
+                           request: Request,
+                           response: Response,
+                           product_slug: str,
+                           cursor: str | None = None,
+                           limit: PageLimit = settings.page_default_limit):
+    not_modified = await conditional_response(request, response, db,
+                                              'products', 'reviews')
+    if not_modified is not None:
+        return not_modified
+    product = await product_cache.get(product_slug)
     if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -40,14 +65,17 @@ async def products_reviews(db: Annotated[AsyncSession, Depends(get_db)],
         )
     select_reviews_query = (select(Review)
                             .where((Review.is_active == True) &
-                                   (Review.product_id == product.id)))
+                                   (Review.product_id == product['id'])))
+    select_reviews_query = keyset(select_reviews_query, (Review.id,),
+                                  cursor, limit)
     reviews = (await db.scalars(select_reviews_query)).all()
+    await db.close()
     if not reviews:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='There are no reviews'
         )
-    return reviews
+    return page(reviews, limit)
 
 
 @router.post('/{product_slug}')
@@ -55,27 +83,30 @@ async def add_review(db: Annotated[AsyncSession, Depends(get_db)],
                      create_review: CreateReview,
                      user: Annotated[dict, Depends(get_current_user)],
                      product_slug: str):
-    select_product_query = (select(Product)
-                            .where((Product.slug == product_slug) &
-                                   (Product.is_active == True)))
-    product = await db.scalar(select_product_query)
+    product = await product_cache.get(product_slug)
     if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='Product not found'
         )
-    add_review_query = (insert(Review)
-                        .values(product_id=product.id,
-                                user_id=user.get('id'),
-                                **create_review.model_dump()))
+    new_review = (insert(Review)
+                  .values(product_id=product['id'],
+                          user_id=user.get('id'),
+                          **create_review.model_dump())
+                  .returning(Review.product_id, Review.grade)
+                  .cte('new_review'))
+    add_review_query = (update(Product)
+                        .where(Product.id == new_review.c.product_id)
+                        .values(review_count=Product.review_count + 1,
+                                grade_sum=(Product.grade_sum +
+                                           new_review.c.grade))
+                        .add_cte(new_review)
+                        .execution_options(synchronize_session=False))
     await db.execute(add_review_query)
-    product_rating_query = (select(func.avg(Review.grade))
-                            .select_from(Review)
-                            .where((Review.is_active == True) &
-                                   (Review.product_id == product.id)))
-    product_rating = await db.scalar(product_rating_query)
-    product.rating = product_rating
+    await product_cache.invalidate(db, product_slug)
+    await bump_versions(db, 'products', 'reviews')
     await db.commit()
+    await product_cache.committed(db)
     return {'status_code': status.HTTP_200_OK,
             'transaction': 'Review added successfully'}
 
@@ -89,15 +120,29 @@ async def delete_reviews(db: Annotated[AsyncSession, Depends(get_db)],
             status_code=status.HTTP_403_FORBIDDEN,
             detail='You are not authorized to use this method'
         )
-    select_review_query = select(Review).where((Review.id == review_id) &
-                                               (Review.is_active == True))
-    review = await db.scalar(select_review_query)
-    if review is None:
+    deleted_review = (update(Review)
+                      .where((Review.id == review_id) &
+                             (Review.is_active == True))
+                      .values(is_active=False)
+                      .returning(Review.product_id, Review.grade)
+                      .cte('deleted_review'))
+    delete_review_query = (update(Product)
+                           .where(Product.id == deleted_review.c.product_id)
+                           .values(review_count=Product.review_count - 1,
+                                   grade_sum=(Product.grade_sum -
+                                              deleted_review.c.grade))
+                           .returning(Product.slug)
+                           .add_cte(deleted_review)
+                           .execution_options(synchronize_session=False))
+    product_slug = await db.scalar(delete_review_query)
+    if product_slug is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='There are no review found'
         )
-    review.is_active = False
+    await product_cache.invalidate(db, product_slug)
+    await bump_versions(db, 'products', 'reviews')
     await db.commit()
+    await product_cache.committed(db)
     return {'status_code': status.HTTP_200_OK,
             'transaction': 'Review delete is successful'}
\ No newline at end of file
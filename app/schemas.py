@@ -1,4 +1,9 @@
-from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict, Field
+
+T = TypeVar('T')
 
 
 class CreateProduct(BaseModel):
@@ -10,11 +15,44 @@ class CreateProduct(BaseModel):
     category_id: int
 
 
+class ProductRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    slug: str
+    description: str
+    price: int
+    image_url: str
+    stock: int
+    rating: float
+    review_count: int
+    category_id: int
+
+
 class CreateCategory(BaseModel):
     name: str
     parent_id: int | None = None
 
 
+class CategoryRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    slug: str
+    parent_id: int | None
+
+
+class CategoryNode(BaseModel):
+    id: int
+    name: str
+    slug: str
+    product_count: int
+    subtree_product_count: int
+    children: list['CategoryNode']
+
+
 class CreateUser(BaseModel):
     first_name: str
     last_name: str
@@ -25,4 +63,70 @@ class CreateUser(BaseModel):
 
 class CreateReview(BaseModel):
     comment: str
-    grade: int = Field(..., ge=1, le=5)
\ No newline at end of file
+    grade: int = Field(..., ge=1, le=5)
+
+
+class ReviewRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    comment: str | None
+    grade: int
+    comment_date: datetime
+    user_id: int
+    product_id: int
+
+
+class CartItem(BaseModel):
+    product_id: int
+    quantity: int = Field(..., ge=1)
+
+
+class CreateOrder(BaseModel):
+    items: list[CartItem] = Field(..., min_length=1, max_length=100)
+
+
+class OrderItemRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    product_id: int
+    quantity: int
+    price: int
+
+
+class OrderRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    total: int
+    created_at: datetime
+    items: list[OrderItemRead]
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class PriceFacet(BaseModel):
+    min: int
+    max: int | None
+    count: int
+
+
+class RatingFacet(BaseModel):
+    min: int
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    price: list[PriceFacet]
+    rating: list[RatingFacet]
+    in_stock: int
+    out_of_stock: int
+
+
+class ProductPage(Page[ProductRead]):
+    facets: ProductFacets | None = None
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+from time import perf_counter
+
+import httpx
+from sqlalchemy import func, insert, select, text
+
+from app.backend.db import async_session_maker
+from app.backend.settings import settings
+from app.main import app
+from app.models import Category, Product
+from app.models.orders import OrderItem
+from app.models.user import User
+from app.routers.auth import create_access_token
+from benchmarks.stats import summarize
+
+
+async def create_products(stocks: list[int]) -> list[int]:
+    async with async_session_maker() as db:
+        category_id = await db.scalar(
+            insert(Category)
+            .values(name='Contention', slug=f'contention-{perf_counter()}')
+            .returning(Category.id)
+        )
+        ids = (await db.scalars(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True),
+            [{'name': f'Contention {i}',
+              'slug': f'contention-{i}-{perf_counter()}',
+              'description': 'Checkout contention benchmark',
+              'price': 100,
+              'image_url': 'https://example.com/contention.png',
+              'stock': stock,
+              'category_id': category_id}
+             for i, stock in enumerate(stocks)]
+        )).all()
+        await db.commit()
+    return list(ids)
+
+
+async def sample_lock_waits(stop: asyncio.Event) -> int:
+    # The most backends seen waiting on a lock at once during the run.
+    most = 0
+    async with async_session_maker() as db:
+        while not stop.is_set():
+            most = max(most, await db.scalar(
+                text('SELECT count(*) FROM pg_locks WHERE NOT granted')
+            ))
+            await db.rollback()
+            await asyncio.sleep(.005)
+    return most
+
+
+async def buyer_tokens(count: int) -> list[str]:
+    async with async_session_maker() as db:
+        users = (await db.execute(
+            select(User.id, User.username, User.is_admin, User.is_supplier,
+                   User.is_customer, User.token_version)
+            .where(User.is_active == True).order_by(User.id).limit(count)
+        )).all()
+    if not users:
+        sys.exit('No users found, seed the database first '
+                 '(python -m benchmarks.seed)')
+    expires = timedelta(seconds=settings.token_expires_seconds)
+    return [create_access_token(user.username, user.id, user.is_admin,
+                                user.is_supplier, user.is_customer,
+                                expires_delta=expires,
+                                token_version=user.token_version)
+            for user in users]
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with app.router.lifespan_context(app):
+        if args.scenario == 'hot':
+            # Every cart holds the same two products; only the hot one can
+            # run out.
+            hot_id, cold_id = await create_products([args.stock, 10 ** 9])
+            checked = [hot_id]
+            initial = args.stock
+
+            def cart(i: int) -> list[dict]:
+                # Half of the carts list the products in the opposite order
+                # to exercise lock ordering between overlapping carts.
+                items = [{'product_id': hot_id, 'quantity': args.quantity},
+                         {'product_id': cold_id, 'quantity': 1}]
+                if i % 2:
+                    items.reverse()
+                return items
+        else:
+            # Every buyer has a product of their own, so no two checkouts
+            # share a row and none should wait on another.
+            checked = await create_products([args.stock] * args.buyers)
+            initial = args.stock * args.buyers
+
+            def cart(i: int) -> list[dict]:
+                return [{'product_id': checked[i],
+                         'quantity': args.quantity}]
+
+        tokens = await buyer_tokens(args.buyers)
+        timings = []
+        statuses = {}
+
+        async def buy(client: httpx.AsyncClient, i: int):
+            start = perf_counter()
+            response = await client.post(
+                '/orders/', json={'items': cart(i)},
+                headers={'Authorization':
+                         f'Bearer {tokens[i % len(tokens)]}'}
+            )
+            timings.append((perf_counter() - start) * 1000)
+            statuses[response.status_code] = (
+                statuses.get(response.status_code, 0) + 1
+            )
+
+        stop = asyncio.Event()
+        lock_waits = asyncio.create_task(sample_lock_waits(stop))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url='http://bench') as client:
+            start = perf_counter()
+            await asyncio.gather(*(buy(client, i)
+                                   for i in range(args.buyers)))
+            elapsed = perf_counter() - start
+        stop.set()
+        most_waiting = await lock_waits
+
+        async with async_session_maker() as db:
+            stock = await db.scalar(select(func.sum(Product.stock))
+                                    .where(Product.id.in_(checked)))
+            sold = await db.scalar(select(func.coalesce(
+                func.sum(OrderItem.quantity), 0
+            )).where(OrderItem.product_id.in_(checked)))
+
+    placed = statuses.get(200, 0) * args.quantity
+    print(f'{args.scenario}: {args.buyers} buyers, {initial} in stock, '
+          f'{args.buyers / elapsed:.1f} checkouts/s')
+    print(f'statuses: {dict(sorted(statuses.items()))}')
+    print(f'latency: {summarize(timings)}')
+    print(f'most backends waiting on a lock: {most_waiting}')
+    print(f'sold {sold}, stock left {stock}')
+    errors = []
+    if stock < 0:
+        errors.append('stock went negative')
+    if sold + stock != initial:
+        errors.append('sold and remaining stock do not add up')
+    if sold != placed:
+        errors.append('sold quantity does not match successful checkouts')
+    if set(statuses) - {200, 409}:
+        errors.append('unexpected statuses')
+    for error in errors:
+        print(f'FAILED: {error}')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Run concurrent checkouts and verify that no product is '
+                    'oversold. "hot" carts all share one scarce product; '
+                    '"disjoint" carts each buy a different product and '
+                    'should not wait on each other.'
+    )
+    parser.add_argument('--scenario', choices=('hot', 'disjoint'),
+                        default='hot')
+    parser.add_argument('--buyers', type=int, default=200)
+    parser.add_argument('--stock', type=int, default=50)
+    parser.add_argument('--quantity', type=int, default=1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
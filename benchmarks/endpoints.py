@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import timedelta
+from time import perf_counter
+from typing import Callable
+
+import httpx
+from sqlalchemy import event, select
+
+from app.backend.db import async_session_maker, engine, read_engine
+from app.backend.settings import settings
+from app.main import app
+from app.models import Category, Product
+from app.models.products import IN_STOCK
+from app.models.user import User
+from app.routers.auth import create_access_token
+from benchmarks import seed
+from benchmarks.stats import summarize
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    url: Callable[[random.Random], str]
+    role: str | None = None
+    body: Callable[[random.Random], dict] | None = None
+    data: Callable[[random.Random], dict] | None = None
+    requests: int | None = None
+
+
+@dataclass
+class Fixtures:
+    product_slugs: list[str]
+    product_ids: list[int]
+    category_ids: list[int]
+    category_slugs: list[str]
+    user_ids: list[int]
+    tokens: dict[str, str] = field(default_factory=dict)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+    def attach(self):
+        for sync_engine in {engine.sync_engine, read_engine.sync_engine}:
+            event.listen(sync_engine, 'before_cursor_execute', self)
+
+
+async def load_fixtures() -> Fixtures:
+    async with async_session_maker() as db:
+        products = (await db.execute(
+            select(Product.id, Product.slug)
+            .where((Product.is_active == True) & IN_STOCK)
+            .order_by(Product.id).limit(1000)
+        )).all()
+        categories = (await db.execute(
+            select(Category.id, Category.slug)
+            .where(Category.is_active == True)
+        )).all()
+        users = (await db.execute(
+            select(User.id, User.username, User.is_admin,
+                   User.is_supplier, User.is_customer, User.token_version)
+            .where(User.is_active == True).order_by(User.id)
+        )).all()
+    fixtures = Fixtures([product.slug for product in products],
+                        [product.id for product in products],
+                        [category.id for category in categories],
+                        [category.slug for category in categories],
+                        [])
+    expires = timedelta(seconds=settings.token_expires_seconds)
+    token_users = set()
+    for role in ('is_admin', 'is_supplier', 'is_customer'):
+        user = next(user for user in users
+                    if getattr(user, role) and user.id not in token_users)
+        token_users.add(user.id)
+        fixtures.tokens[role.removeprefix('is_')] = create_access_token(
+            user.username, user.id, user.is_admin, user.is_supplier,
+            user.is_customer, expires_delta=expires,
+            token_version=user.token_version
+        )
+    # Permission toggles must not touch the users the tokens belong to.
+    fixtures.user_ids = [user.id for user in users
+                         if user.id not in token_users]
+    return fixtures
+
+
+def scenarios(fixtures: Fixtures) -> list[Scenario]:
+    product = lambda rng: rng.choice(fixtures.product_slugs)
+    category = lambda rng: rng.choice(fixtures.category_slugs)
+    return [
+        Scenario('welcome', 'GET', lambda rng: '/'),
+        Scenario('health_ready', 'GET', lambda rng: '/health/ready'),
+        Scenario('categories', 'GET', lambda rng: '/categories/'),
+        Scenario('category_tree', 'GET', lambda rng: '/categories/tree'),
+        Scenario('products', 'GET', lambda rng: '/products/'),
+        Scenario('products_fields', 'GET',
+                 lambda rng: '/products/?fields=name,slug,price,rating'),
+        Scenario('products_faceted', 'GET',
+                 lambda rng: f'/products/?sort=price_asc&facets=true'
+                             f'&min_price={rng.randint(0, 50_000)}'),
+        Scenario('products_by_category', 'GET',
+                 lambda rng: f'/products/{category(rng)}'),
+        Scenario('product_detail', 'GET',
+                 lambda rng: f'/products/detail/{product(rng)}'),
+        Scenario('product_search', 'GET',
+                 lambda rng: '/products/search?q='
+                             + rng.choice(('red', 'steel', 'blue oak'))),
+        Scenario('reviews', 'GET', lambda rng: '/reviews/'),
+        Scenario('product_reviews', 'GET',
+                 lambda rng: f'/reviews/{product(rng)}'),
+        Scenario('read_current_user', 'GET',
+                 lambda rng: '/auth/read_current_user', role='customer'),
+        Scenario('token_cache_stats', 'GET',
+                 lambda rng: '/admin/token_cache', role='admin'),
+        Scenario('product_cache_stats', 'GET',
+                 lambda rng: '/admin/product_cache', role='admin'),
+        # All requests come from one client and one username, so raise
+        # LOGIN_BURST and LOGIN_IP_BURST to measure hashing rather than the
+        # rate limiter's 429s.
+        Scenario('login', 'POST', lambda rng: '/auth/token',
+                 data=lambda rng: {'username': 'bench_user_3',
+                                   'password': seed.PASSWORD},
+                 requests=50),
+        Scenario('add_review', 'POST',
+                 lambda rng: f'/reviews/{product(rng)}', role='customer',
+                 body=lambda rng: {'comment': 'Benchmark review',
+                                   'grade': rng.randint(1, 5)}),
+        Scenario('create_product', 'POST', lambda rng: '/products/',
+                 role='supplier',
+                 body=lambda rng: {'name': f'Bench {rng.getrandbits(64)}',
+                                   'description': 'Benchmark product',
+                                   'price': rng.randint(1, 1000),
+                                   'image_url': 'https://example.com/b.png',
+                                   'stock': 10,
+                                   'category_id': rng.choice(
+                                       fixtures.category_ids)}),
+        Scenario('checkout', 'POST', lambda rng: '/orders/', role='customer',
+                 body=lambda rng: {'items': [
+                     {'product_id': product_id, 'quantity': 1}
+                     for product_id in rng.sample(fixtures.product_ids, 3)
+                 ]}),
+        Scenario('my_orders', 'GET', lambda rng: '/orders/',
+                 role='customer'),
+        Scenario('supplier_permission', 'PATCH',
+                 lambda rng: f'/permission/?user_id='
+                             f'{rng.choice(fixtures.user_ids)}',
+                 role='admin'),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario,
+                       fixtures: Fixtures, requests: int, concurrency: int,
+                       counter: QueryCounter, rng: random.Random) -> dict:
+    headers = {}
+    if scenario.role is not None:
+        headers['Authorization'] = f'Bearer {fixtures.tokens[scenario.role]}'
+    plan = [(scenario.url(rng),
+             scenario.body(rng) if scenario.body else None,
+             scenario.data(rng) if scenario.data else None)
+            for _ in range(requests)]
+    timings = []
+    statuses = {}
+
+    async def worker():
+        while plan:
+            url, body, data = plan.pop()
+            start = perf_counter()
+            response = await client.request(scenario.method, url,
+                                            headers=headers,
+                                            json=body, data=data)
+            timings.append((perf_counter() - start) * 1000)
+            statuses[response.status_code] = (
+                statuses.get(response.status_code, 0) + 1
+            )
+
+    queries_before = counter.count
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    return {'requests': requests,
+            'concurrency': concurrency,
+            'requests_per_second': requests / elapsed,
+            'queries_per_request': (counter.count - queries_before) / requests,
+            'statuses': {str(code): count
+                         for code, count in sorted(statuses.items())},
+            **summarize(timings)}
+
+
+async def main(args: argparse.Namespace) -> dict:
+    if not args.skip_seed:
+        await seed.seed_from_args(args)
+    counter = QueryCounter()
+    counter.attach()
+    rng = random.Random(args.random_seed)
+    results = {'config': vars(args), 'scenarios': {}}
+    async with app.router.lifespan_context(app):
+        fixtures = await load_fixtures()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url='http://bench') as client:
+            for scenario in scenarios(fixtures):
+                if args.only and scenario.name not in args.only:
+                    continue
+                requests = min(scenario.requests or args.requests,
+                               args.requests)
+                result = await run_scenario(client, scenario, fixtures,
+                                            requests, args.concurrency,
+                                            counter, rng)
+                results['scenarios'][scenario.name] = result
+                print(f'{scenario.name:24} '
+                      f'{result["requests_per_second"]:9.1f} req/s  '
+                      f'p50 {result["p50_ms"]:8.2f} ms  '
+                      f'p95 {result["p95_ms"]:8.2f} ms  '
+                      f'p99 {result["p99_ms"]:8.2f} ms  '
+                      f'{result["queries_per_request"]:5.2f} q/req  '
+                      f'{result["statuses"]}')
+    return results
+
+
+def compare(baseline_path: str, current_path: str,
+            max_regression: float) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)['scenarios']
+    with open(current_path) as f:
+        current = json.load(f)['scenarios']
+    regressions = 0
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p95_ms'], result['p95_ms']
+        change = (after - before) / before if before else .0
+        marker = ''
+        if change > max_regression:
+            marker = '  REGRESSION'
+            regressions += 1
+        print(f'{name:24} p95 {before:8.2f} -> {after:8.2f} ms '
+              f'({change:+.1%}){marker}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Seed a catalog and benchmark every router in-process'
+    )
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--only', nargs='+', metavar='SCENARIO')
+    parser.add_argument('--skip-seed', action='store_true',
+                        help='benchmark the database as it is')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='compare two result files and exit non-zero '
+                             'on a p95 regression')
+    parser.add_argument('--max-regression', type=float, default=.2)
+    seed.add_arguments(parser)
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(compare(*args.compare, args.max_regression))
+    results = asyncio.run(main(args))
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import statistics
+
+from sqlalchemy import literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.category_tree import CategoryTree
+from app.backend.db import async_session_maker, engine
+from app.models import Category, Product
+from app.models.products import IN_STOCK
+from app.models.reviews import Review
+from benchmarks import seed
+
+PAGE_SIZE = 50
+
+
+async def hot_queries(db: AsyncSession) -> dict:
+    tree = CategoryTree()
+    await tree.load(db)
+    root_id = max(tree.descendants, key=lambda i: len(tree.descendants[i]))
+    leaf_id = min(tree.descendants, key=lambda i: len(tree.descendants[i]))
+    product_id = await db.scalar(
+        select(Review.product_id)
+        .group_by(Review.product_id)
+        .order_by(text('count(*) DESC'))
+        .limit(1)
+    )
+    listed = (Product.is_active == True) & IN_STOCK
+    return {
+        'all_products': (select(Product).join(Category)
+                         .where(listed & (Category.is_active == True))
+                         .order_by(Product.id).limit(PAGE_SIZE + 1)),
+        'product_by_category_root': (
+            select(Product)
+            .where(Product.category_id.in_(tree.descendants[root_id]) &
+                   listed)
+            .order_by(Product.id).limit(PAGE_SIZE + 1)
+        ),
+        'product_by_category_leaf': (
+            select(Product)
+            .where(Product.category_id.in_(tree.descendants[leaf_id]) &
+                   listed)
+            .order_by(Product.id).limit(PAGE_SIZE + 1)
+        ),
+        'products_reviews': (select(Review)
+                             .where((Review.is_active == True) &
+                                    (Review.product_id == product_id))
+                             .order_by(Review.id).limit(PAGE_SIZE + 1)),
+    }
+
+
+def plan_nodes(plan: dict) -> list[str]:
+    node = plan['Node Type']
+    if 'Index Name' in plan:
+        node += f' using {plan["Index Name"]}'
+    nodes = [node]
+    for child in plan.get('Plans', ()):
+        nodes += plan_nodes(child)
+    return nodes
+
+
+def literal_sql(value) -> str:
+    return str(literal(value).compile(dialect=engine.dialect,
+                                      compile_kwargs={'literal_binds': True}))
+
+
+async def explain(repeat: int, plan_cache_mode: str) -> dict:
+    results = {}
+    async with async_session_maker() as db:
+        # Each statement is prepared with the bind parameters the app sends,
+        # as asyncpg does; a generic plan is what such statements end up
+        # with after a few executions.
+        conn = await db.connection()
+        await conn.exec_driver_sql(f'SET plan_cache_mode = {plan_cache_mode}')
+        for name, query in (await hot_queries(db)).items():
+            compiled = query.compile(
+                dialect=engine.dialect,
+                compile_kwargs={'render_postcompile': True}
+            )
+            sql = str(compiled)
+            args = ', '.join(literal_sql(compiled.params[key])
+                             for key in compiled.positiontup)
+            execute = f'EXECUTE {name}({args})' if args else f'EXECUTE {name}'
+            await conn.exec_driver_sql(f'PREPARE {name} AS {sql}')
+            timings = []
+            for _ in range(repeat):
+                plan = (await conn.exec_driver_sql(
+                    'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + execute
+                )).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                plan = plan[0]
+                timings.append(plan['Execution Time'])
+            await conn.exec_driver_sql(f'DEALLOCATE {name}')
+            results[name] = {'sql': sql,
+                             'nodes': plan_nodes(plan['Plan']),
+                             'median_ms': statistics.median(timings),
+                             'timings_ms': timings,
+                             'plan': plan}
+    return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    for name, result in before.items():
+        if name not in after:
+            continue
+        print(f'{name}: {result["median_ms"]:.3f} ms -> '
+              f'{after[name]["median_ms"]:.3f} ms')
+        print(f'  before: {" / ".join(result["nodes"])}')
+        print(f'  after:  {" / ".join(after[name]["nodes"])}')
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.seed:
+        await seed.seed_from_args(args)
+    results = await explain(args.repeat, args.plan_cache_mode)
+    await engine.dispose()
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    for name, result in results.items():
+        print(f'{name}: {result["median_ms"]:.3f} ms '
+              f'({" / ".join(result["nodes"])})')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Record EXPLAIN ANALYZE plans and timings of the hot '
+                    'listing queries. Run once before and once after '
+                    '`alembic upgrade`, then compare the two outputs.'
+    )
+    parser.add_argument('--output', default='explain.json')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--plan-cache-mode', default='force_generic_plan',
+                        choices=('auto', 'force_generic_plan',
+                                 'force_custom_plan'))
+    parser.add_argument('--seed', action='store_true',
+                        help='reset and seed the database first')
+    parser.add_argument('--compare', nargs=2,
+                        metavar=('BEFORE', 'AFTER'))
+    seed.add_arguments(parser)
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import json
+from time import perf_counter
+
+import httpx
+from sqlalchemy import func, select
+
+from app.backend.category_tree import CategoryTree
+from app.backend.db import async_session_maker, engine
+from app.main import app
+from app.models import Product
+from benchmarks import seed
+from benchmarks.stats import summarize
+
+TERMS = ('red', 'steel', 'blue oak', 'green -cotton', '"red steel"',
+         'product 4242', 'nothingmatches')
+
+
+async def largest_category_slug() -> str:
+    tree = CategoryTree()
+    async with async_session_maker() as db:
+        await tree.load(db)
+    category_id = max(tree.descendants,
+                      key=lambda i: len(tree.descendants[i]))
+    return next(slug for slug, i in tree.by_slug.items() if i == category_id)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.seed:
+        await seed.seed_from_args(args)
+    async with async_session_maker() as db:
+        product_count = await db.scalar(select(func.count(Product.id)))
+    category_slug = await largest_category_slug()
+
+    results = {'products': product_count, 'queries': {}}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url='http://bench') as client:
+        for term in TERMS:
+            for category in (None, category_slug):
+                params = {'q': term, 'limit': args.limit}
+                if category is not None:
+                    params['category'] = category
+                timings = []
+                for _ in range(args.repeat):
+                    start = perf_counter()
+                    response = await client.get('/products/search',
+                                                params=params)
+                    timings.append((perf_counter() - start) * 1000)
+                    response.raise_for_status()
+                name = f'{term} [{category or "all"}]'
+                results['queries'][name] = {
+                    'returned': len(response.json()['items']),
+                    **summarize(timings)
+                }
+                print(f'{name}: p50 {results["queries"][name]["p50_ms"]:.2f}'
+                      f' ms, p95 {results["queries"][name]["p95_ms"]:.2f} ms')
+    await engine.dispose()
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark GET /products/search over a seeded catalog'
+    )
+    parser.add_argument('--output', default='search.json')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--seed', action='store_true',
+                        help='reset and seed the database first')
+    seed.add_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.category_counts import rebuild_category_counts
+from app.backend.db import async_session_maker
+from app.backend.passwords import password_hasher
+from app.commands.check_ratings import recount_ratings
+from app.models import Category, Product
+from app.models.reviews import Review
+from app.models.user import User
+
+BATCH_SIZE = 5000
+PASSWORD = 'password'
+
+
+def batches(rows, size=BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def reset(db: AsyncSession) -> None:
+    await db.execute(text('TRUNCATE reviews, products, categories, users '
+                          'RESTART IDENTITY CASCADE'))
+    await db.commit()
+
+
+async def seed_users(db: AsyncSession, count: int) -> list[int]:
+    hashed_password = await password_hasher.hash(PASSWORD)
+    rows = [{'first_name': 'Bench',
+             'last_name': f'User{i}',
+             'username': f'bench_user_{i}',
+             'email': f'bench_user_{i}@example.com',
+             'hashed_password': hashed_password,
+             'is_admin': i == 0,
+             'is_supplier': i % 10 == 1,
+             'is_customer': i % 10 != 1}
+            for i in range(count)]
+    ids = []
+    for batch in batches(rows):
+        ids += (await db.scalars(insert(User).returning(User.id),
+                                 batch)).all()
+    await db.commit()
+    return ids
+
+
+async def seed_categories(db: AsyncSession, depth: int,
+                          fanout: int) -> list[int]:
+    ids = []
+    parents = [None]
+    for level in range(depth):
+        rows = [{'name': f'Category {level}-{n}-{i}',
+                 'slug': f'category-{level}-{n}-{i}',
+                 'parent_id': parent_id}
+                for n, parent_id in enumerate(parents)
+                for i in range(fanout)]
+        parents = []
+        for batch in batches(rows):
+            parents += (await db.scalars(
+                insert(Category).returning(Category.id), batch
+            )).all()
+        ids += parents
+    await db.commit()
+    return ids
+
+
+async def seed_products(db: AsyncSession, count: int,
+                        category_ids: list[int], supplier_ids: list[int],
+                        rng: random.Random) -> list[int]:
+    ids = []
+    for start in range(0, count, BATCH_SIZE):
+        rows = [{'name': f'Product {i}',
+                 'slug': f'product-{i}',
+                 'description': f'Seeded product number {i} with a '
+                                f'{rng.choice(("red", "green", "blue"))} '
+                                f'{rng.choice(("cotton", "steel", "oak"))} '
+                                f'finish',
+                 'price': rng.randint(1, 100_000),
+                 'image_url': f'https://example.com/images/{i}.png',
+                 'stock': rng.choice((0, rng.randint(1, 500))),
+                 'is_active': rng.random() > .05,
+                 'category_id': rng.choice(category_ids),
+                 'supplier_id': rng.choice(supplier_ids)}
+                for i in range(start, min(start + BATCH_SIZE, count))]
+        ids += (await db.scalars(insert(Product).returning(Product.id),
+                                 rows)).all()
+        await db.commit()
+    return ids
+
+
+async def seed_reviews(db: AsyncSession, count: int, product_ids: list[int],
+                       user_ids: list[int], rng: random.Random) -> None:
+    for start in range(0, count, BATCH_SIZE):
+        rows = [{'comment': f'Seeded review {i}',
+                 'grade': rng.randint(1, 5),
+                 'is_active': rng.random() > .05,
+                 'user_id': rng.choice(user_ids),
+                 'product_id': rng.choice(product_ids)}
+                for i in range(start, min(start + BATCH_SIZE, count))]
+        await db.execute(insert(Review), rows)
+        await db.commit()
+    await recount_ratings(db)
+
+
+async def seed(depth: int = 3, fanout: int = 5, products: int = 100_000,
+               users: int = 100, reviews: int = 200_000,
+               random_seed: int = 0) -> None:
+    rng = random.Random(random_seed)
+    async with async_session_maker() as db:
+        await reset(db)
+        user_ids = await seed_users(db, users)
+        supplier_ids = user_ids[1::10] or user_ids
+        category_ids = await seed_categories(db, depth, fanout)
+        product_ids = await seed_products(db, products, category_ids,
+                                          supplier_ids, rng)
+        await rebuild_category_counts(db)
+        await seed_reviews(db, reviews, product_ids, user_ids, rng)
+        await db.execute(text('ANALYZE'))
+        await db.commit()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--reviews', type=int, default=200_000)
+    parser.add_argument('--random-seed', type=int, default=0)
+
+
+def seed_from_args(args: argparse.Namespace):
+    return seed(args.depth, args.fanout, args.products, args.users,
+                args.reviews, args.random_seed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Reset the database and seed a benchmark catalog'
+    )
+    add_arguments(parser)
+    asyncio.run(seed_from_args(parser.parse_args()))
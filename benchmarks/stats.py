@@ -0,0 +1,14 @@
+import statistics
+
+
+def summarize(timings_ms: list[float]) -> dict:
+    if len(timings_ms) < 2:
+        value = timings_ms[0] if timings_ms else .0
+        return {'count': len(timings_ms), 'p50_ms': value,
+                'p95_ms': value, 'p99_ms': value, 'max_ms': value}
+    percentiles = statistics.quantiles(timings_ms, n=100, method='inclusive')
+    return {'count': len(timings_ms),
+            'p50_ms': statistics.median(timings_ms),
+            'p95_ms': percentiles[94],
+            'p99_ms': percentiles[98],
+            'max_ms': max(timings_ms)}